@@ -0,0 +1,10 @@
+@echo off
+setlocal
+
+REM Navigate to the program folder
+cd /d "%~dp0src\"
+
+REM Execute Python program, keeps serving transactions until the window is closed
+python server.py
+
+REM End of script.
\ No newline at end of file
@@ -0,0 +1,268 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Batch transaction generator
+#
+# Reads a list of (category, total) targets, one per line, from a file or
+# from stdin and writes every generated transaction to a single HTML page
+# or to one JSONL record per transaction. Example input...
+#
+#   food,300
+#   otc,45.50
+#
+# Usage: python batch.py targets.txt --workers 4 --seed 7 --format jsonl
+#
+# With --stock the items drawn come out of the stock counts of the
+# catalog for the rest of the batch, so no item is picked more times than
+# it is in stock and well stocked items are picked more often. The stock
+# is shared by every transaction, so these batches run in one process.
+#
+###########################################################################
+
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+import pages
+import randomize
+
+# Catalogs handed to every worker process once, keyed by category
+workerCatalogs = {}
+
+############################################################################################
+# Utility functions defined here to facilitate reading targets and loading catalogs
+############################################################################################
+
+# Function to parse 'category,total' lines into a list of (category, total) targets
+def readTargets(inputFile):
+
+    targets = []
+
+    for lineNumber, line in enumerate(inputFile, start=1):
+
+        # Skip blank lines and comments
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        # Accept both comma and whitespace separated values
+        parts = line.replace(',', ' ', 1).split()
+        if len(parts) != 2 or not randomize.monetaryValueValidation(parts[1]):
+            raise ValueError(f"Invalid target on line {lineNumber}: {line}")
+
+        category = parts[0].lower()
+        if category not in ('food', 'otc'):
+            raise ValueError(f"Invalid category on line {lineNumber}: {parts[0]}")
+
+        targets.append((category, float(parts[1].replace(',', ''))))
+
+    return targets
+
+# End of readTargets
+
+# Function to load and index every category named in the targets exactly once, priced under a tax profile when one is given
+def loadCatalogs(targets, taxProfile=None):
+
+    catalogs = {}
+
+    for category in sorted(set(category for category, total in targets)):
+        jsonData = randomize.loadJsonData(category)
+        if taxProfile is not None:
+            import tax
+            jsonData = tax.repriceItems(jsonData, category, taxProfile)
+
+        # Compact item records are cheaper to hold and to send to every worker than the dicts
+        priceIndex = randomize.buildPriceIndex(jsonData)
+        catalogs[category] = (randomize.compactItems(jsonData), priceIndex, randomize.buildAliasSampler(priceIndex))
+
+    return catalogs
+
+# End of loadCatalogs
+
+############################################################################################
+# Worker functions run inside the process pool
+############################################################################################
+
+# Pool initializer stores the catalogs once per worker instead of once per task
+def initWorker(catalogs):
+    global workerCatalogs
+    workerCatalogs = catalogs
+
+# Function to generate one transaction, seeded per task so a batch seed reproduces the same output
+def generateTransaction(taskIndex, category, total, exactTotal, seed):
+
+    # Derive an independent seed for this task or fall back to system entropy
+    if seed is None:
+        random.seed()
+    else:
+        random.seed(f"{seed}-{taskIndex}")
+
+    jsonData, priceIndex, sampler = workerCatalogs[category]
+
+    # Alias tables are built once per worker and reused by every later task in the same cap band, the best of a few runs is kept like the menu does
+    if exactTotal:
+        itemAndRemainder = randomize.exactRandomizer(category, total, jsonData, priceIndex)
+    else:
+        itemAndRemainder = randomize.bestRandomizer(category, total, jsonData, priceIndex, sampler=sampler)
+
+    return {
+        'category': category,
+        'total': total,
+        'selectedItems': itemAndRemainder['selectedItems'],
+        'remainder': round(itemAndRemainder['remainder'], 2)
+    }
+
+# End of generateTransaction
+
+############################################################################################
+# Operation functions that handle the batch as a whole
+############################################################################################
+
+# Function to generate all transactions for the given targets, in target order
+@metrics.timed('generateBatch', lambda result, targets, *args, **kwargs: {'transactions': len(targets)})
+def generateBatch(targets, workers=None, exactTotal=False, seed=None, useStock=False, taxProfile=None):
+
+    catalogs = loadCatalogs(targets, taxProfile)
+
+    if useStock:
+        return generateStockBatch(targets, catalogs, seed)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(catalogs,)) as executor:
+        futures = [
+            executor.submit(generateTransaction, taskIndex, category, total, exactTotal, seed)
+            for taskIndex, (category, total) in enumerate(targets)
+        ]
+        return [future.result() for future in futures]
+
+# End of generateBatch
+
+# Function to generate all transactions in target order from one stock sampler per category, drawn items stay out of stock
+def generateStockBatch(targets, catalogs, seed=None):
+
+    random.seed(seed)
+
+    samplers = {}
+    for category, (jsonData, priceIndex, aliasSampler) in catalogs.items():
+        samplers[category] = randomize.buildStockSampler(jsonData, priceIndex)
+
+    transactions = []
+    for category, total in targets:
+        jsonData, priceIndex, aliasSampler = catalogs[category]
+        itemAndRemainder = randomize.bestRandomizer(category, total, jsonData, priceIndex, sampler=samplers[category])
+        transactions.append({
+            'category': category,
+            'total': total,
+            'selectedItems': itemAndRemainder['selectedItems'],
+            'remainder': round(itemAndRemainder['remainder'], 2)
+        })
+
+    return transactions
+
+# End of generateStockBatch
+
+# Function to write all transactions into one html page, one printed page per transaction, images linked from where the page is written
+def writeHtml(transactions, outputFile, mode=None, pagePath=None):
+
+    outputFile.write(pages.pageHead("Batch Items List"))
+
+    for transaction in transactions:
+        imageDirectory = pages.imageDirectoryFor(transaction['category'], pagePath)
+        outputFile.write("<div style='page-break-after: always;'>")
+        outputFile.writelines(pages.transactionChunks(transaction['category'], transaction['total'], transaction['selectedItems'], transaction['remainder'], imageDirectory, mode))
+        outputFile.write("</div>")
+
+    outputFile.write("</body></html>")
+
+# End of writeHtml
+
+# Function to write one json record per transaction
+def writeJsonl(transactions, outputFile, mode=None, pagePath=None):
+    for transaction in transactions:
+        outputFile.write(json.dumps(transaction, default=randomize.itemDict) + "\n")
+
+# End of writeJsonl
+
+# Function to read the targets, generate the batch and write it out
+def runBatch(args):
+
+    # Read the targets from stdin or from the given file
+    if args.input == '-':
+        targets = readTargets(sys.stdin)
+    else:
+        with open(args.input, 'r') as inputFile:
+            targets = readTargets(inputFile)
+
+    transactions = generateBatch(targets, workers=args.workers, exactTotal=args.exact, seed=args.seed, useStock=args.stock, taxProfile=args.tax_profile)
+
+    # Html goes to the parent directory next to selectedItems.html unless told otherwise
+    outputPath = args.output
+    if outputPath is None and args.format == 'html':
+        parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        outputPath = os.path.join(parentDirectory, 'batchItems.html')
+
+    writer = writeHtml if args.format == 'html' else writeJsonl
+
+    if outputPath is None or outputPath == '-':
+        writer(transactions, sys.stdout, args.images)
+    else:
+        with open(outputPath, 'w') as outputFile:
+            writer(transactions, outputFile, args.images, outputPath)
+
+# End of runBatch
+
+##################################################################
+# Main launcher starts the program
+##################################################################
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Generate many random transactions in one run")
+    parser.add_argument('input', nargs='?', default='-', help="file of 'category,total' lines, '-' for stdin")
+    parser.add_argument('--output', '-o', help="output file, defaults to batchItems.html or stdout for jsonl")
+    parser.add_argument('--format', choices=('html', 'jsonl'), default='html')
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--seed', type=int, default=None, help="seed for reproducible batches")
+    parser.add_argument('--exact', action='store_true', help="use the exact total solver")
+    parser.add_argument('--stock', action='store_true', help="take drawn items out of stock for the rest of the batch")
+    parser.add_argument('--images', choices=('link', 'inline', 'svg'), default=None, help="link barcode images or embed them in the html page")
+    parser.add_argument('--tax-profile', default=None, help="draw against full prices of this tax profile instead of the stored ones")
+    metrics.addArguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure(args)
+
+    if args.stock and args.exact:
+        parser.error("--stock cannot be combined with --exact")
+
+    # An unknown profile is reported before any work is done
+    if args.tax_profile is not None:
+        import tax
+        try:
+            tax.taxProfile(args.tax_profile)
+        except tax.TaxProfileError as e:
+            parser.error(str(e))
+
+    with metrics.run('batch'):
+        runBatch(args)
+
+if __name__ == '__main__':
+    main()
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -0,0 +1,492 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Benchmark harness
+#
+# Builds synthetic catalogs and measures each stage of the programs
+# against them, printing one JSON result per stage and size. Every stage
+# reports its best wall time and the peak memory it allocated. The
+# randomizer strategies also report how small their remainders are over
+# many runs, so a faster randomizer that fills baskets worse shows up.
+#
+# Usage: python benchmark.py --sizes 100 1000 10000 100000 1000000 -o new.json
+#        python benchmark.py --sizes 1000 --compare old.json
+#
+# The same seed always builds the same catalogs, so results saved with
+# --output can be compared between versions with --compare. The sampler
+# distribution stage draws from the bisect and alias samplers and runs a
+# chi-square test of the draws against the price weights, a p-value far
+# below 0.01 means a sampler no longer draws in proportion to price.
+#
+###########################################################################
+
+import argparse
+import bisect
+import json
+import marshal
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import catalog
+import pages
+import randomize
+import tax
+
+# Transaction totals the randomizer stages are measured at, a small otc basket and a large food one
+benchmarkTotals = (45.50, 300)
+
+############################################################################################
+# Utility functions that build synthetic data and time stages
+############################################################################################
+
+# Function to build a synthetic catalog of the given size with realistic prices and sku numbers
+def syntheticCatalog(size, seed=0):
+
+    generator = random.Random(seed)
+    jsonData = []
+
+    for index in range(size):
+        price = round(generator.uniform(0.5, 40), 2)
+        taxable = 'TAX' if generator.random() < 0.5 else 'NO TAX'
+        jsonData.append({
+            "name": f"Synthetic item {index}",
+            "price": price,
+            "skuNum": str(100000000000 + index * 7),
+            "taxable": taxable,
+            "fullPrice": tax.calculateFullPrice(price, taxable, profile='default')
+        })
+
+    return jsonData
+
+# End of syntheticCatalog
+
+# Function to run a stage a few times and report the best wall time in milliseconds
+def timeStage(stage, repeat=3):
+
+    best = None
+    for attempt in range(repeat):
+        start = time.perf_counter()
+        stage()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return round(best * 1000, 3)
+
+# End of timeStage
+
+# Function to measure the best wall time of a stage and the peak memory one extra traced run allocates
+def measureStage(stage, repeat=3):
+
+    milliseconds = timeStage(stage, repeat)
+
+    # Tracing slows the stage down, so memory is measured apart from the timing
+    tracemalloc.start()
+    try:
+        stage()
+        peakBytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'milliseconds': milliseconds, 'peakBytes': peakBytes}
+
+# End of measureStage
+
+# Function to summarize a list of remainders with its mean, percentiles and share of near exact totals
+def remainderDistribution(remainders):
+
+    remainders = sorted(remainders)
+    count = len(remainders)
+
+    def percentile(fraction):
+        return round(remainders[min(count - 1, int(fraction * count))], 2)
+
+    return {
+        'runs': count,
+        'mean': round(sum(remainders) / count, 3),
+        'p50': percentile(0.50),
+        'p90': percentile(0.90),
+        'p99': percentile(0.99),
+        'max': round(remainders[-1], 2),
+        'exactShare': round(sum(1 for remainder in remainders if remainder < 0.005) / count, 3),
+        'under9CentsShare': round(sum(1 for remainder in remainders if remainder < 0.09) / count, 3)
+    }
+
+# End of remainderDistribution
+
+############################################################################################
+# Stage functions that each measure one part of the programs
+############################################################################################
+
+# Function to yield a master list page the way it was written before the shared templates, as a baseline
+def inlineStyleMasterListChunks(category, items):
+
+    yield f"<html><head><title>{category} Master List</title></head><body><h1 style=font-size:50px>Food Master List</h1>"
+
+    for index, item in enumerate(items):
+        if index % 3 == 0:
+            yield "<div style='display: flex; flex-wrap: wrap;'>"
+        if item['taxable'] == 'TAX':
+            yield f"<div style='flex-basis: 30%; padding: 20px;'><h2>{item['name']}</h2><h3>Price: ${item['price']} * => ( ${item['fullPrice']} )</h3>"
+        else:
+            yield f"<div style='flex-basis: 30%; padding: 20px;'><h2>{item['name']}</h2><h3>Price: ${item['fullPrice']}</h3>"
+        yield f"<img src='C:/Users/User/Desktop/otcProject/images/{category}/{item['skuNum']}.png'></div>"
+        if (index + 1) % 3 == 0 or index == len(items) - 1:
+            yield "</div>"
+
+    yield f"<h3>Total Items: {len(items)}</h3></body></html>"
+
+# End of inlineStyleMasterListChunks
+
+# Function to measure json catalog saving and loading the way the catalog layer does it
+def benchmarkCatalogIo(jsonData, directory, repeat=3):
+
+    filePath = os.path.join(directory, 'food.json')
+
+    def dump():
+        catalog.atomicWrite(filePath, json.dumps(jsonData, indent=2))
+
+    def load():
+        with open(filePath, 'r') as jsonFile:
+            json.load(jsonFile)
+
+    results = [{'stage': 'jsonDump', 'items': len(jsonData), **measureStage(dump, repeat)}]
+    results.append({'stage': 'jsonLoad', 'items': len(jsonData), **measureStage(load, repeat), 'bytes': os.path.getsize(filePath)})
+
+    # The parse cache holds the checked items in price order, so it stands in for a json load and a sort
+    cacheContent = catalog.parseCacheContent(None, catalog.sortByPrice(jsonData))
+    cachePath = os.path.join(directory, 'food.cache')
+    with open(cachePath, 'wb') as cacheFile:
+        cacheFile.write(cacheContent)
+
+    def loadCache():
+        with open(cachePath, 'rb') as cacheFile:
+            marshal.loads(cacheFile.read())
+
+    results.append({'stage': 'parseCacheLoad', 'items': len(jsonData), **measureStage(loadCache, repeat), 'bytes': len(cacheContent)})
+
+    return results
+
+# End of benchmarkCatalogIo
+
+# Function to measure the memory of a catalog held as item dicts with a float price index, against compact item records with the integer cent index
+def benchmarkCatalogMemory(jsonData):
+
+    sortedData = randomize.sortJson(jsonData)
+
+    def dictCatalog():
+        items = [dict(item) for item in sortedData]
+        prices = [item['fullPrice'] for item in items]
+        cumulative = []
+        runningSum = 0
+        for price in prices:
+            runningSum += price
+            cumulative.append(runningSum)
+        return items, prices, cumulative
+
+    def compactCatalog():
+        return randomize.compactItems(sortedData), randomize.buildPriceIndex(sortedData)
+
+    results = []
+    for name, build in (('catalogMemoryDicts', dictCatalog), ('catalogMemoryCompact', compactCatalog)):
+        tracemalloc.start()
+        try:
+            held = build()
+            currentBytes = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del held
+        results.append({'stage': name, 'items': len(jsonData), 'bytes': currentBytes, 'bytesPerItem': round(currentBytes / max(1, len(jsonData)), 1)})
+
+    return results
+
+# End of benchmarkCatalogMemory
+
+# Function to measure sorting, indexing, item selection and one transaction of each randomizer strategy
+def benchmarkRandomizer(jsonData, repeat=3, selections=1000):
+
+    size = len(jsonData)
+    shuffledData = list(jsonData)
+    random.Random(1).shuffle(shuffledData)
+
+    sortedData = randomize.sortJson(shuffledData)
+    priceIndex = randomize.buildPriceIndex(sortedData)
+    sampler = randomize.buildAliasSampler(priceIndex)
+
+    def selectMany():
+        for selection in range(selections):
+            randomize.selectItem(20, sortedData, priceIndex)
+
+    def aliasSelectMany():
+        for selection in range(selections):
+            randomize.aliasSelectIndex(2000, sampler)
+
+    results = [
+        {'stage': 'sortJson', 'items': size, **measureStage(lambda: randomize.sortJson(shuffledData), repeat)},
+        {'stage': 'buildPriceIndex', 'items': size, **measureStage(lambda: randomize.buildPriceIndex(sortedData), repeat)},
+        {'stage': 'buildAliasSampler', 'items': size, **measureStage(lambda: randomize.buildAliasSampler(priceIndex), repeat)},
+        {'stage': 'selectItem', 'items': size, 'calls': selections, **measureStage(selectMany, repeat)},
+        {'stage': 'aliasSelectIndex', 'items': size, 'calls': selections, **measureStage(aliasSelectMany, repeat)}
+    ]
+
+    for total in benchmarkTotals:
+        for name, strategy in randomizerStrategies(sampler):
+            measurement = measureStage(lambda: strategy('food', total, sortedData, priceIndex), repeat)
+            results.append({'stage': name, 'items': size, 'total': total, **measurement})
+
+    return results
+
+# End of benchmarkRandomizer
+
+# Function to measure working out every full price again under a tax profile, in one pass and item by item
+def benchmarkTax(jsonData, repeat=3):
+
+    def recomputeItemByItem():
+        for item in jsonData:
+            tax.calculateFullPrice(item['price'], item['taxable'], 'food', 'default')
+
+    return [
+        {'stage': 'taxRecompute', 'items': len(jsonData), **measureStage(lambda: tax.recomputeFullPrices(jsonData, 'food', 'default'), repeat)},
+        {'stage': 'taxRecomputeItemByItem', 'items': len(jsonData), **measureStage(recomputeItemByItem, repeat)}
+    ]
+
+# End of benchmarkTax
+
+# Function to list the randomizer strategies by stage name, the alias one drawing from the given sampler
+def randomizerStrategies(sampler):
+    return (
+        ('randomizer', randomize.randomizer),
+        ('aliasRandomizer', lambda category, total, jsonData, priceIndex: randomize.randomizer(category, total, jsonData, priceIndex, sampler)),
+        ('bestRandomizer', randomize.bestRandomizer),
+        ('exactRandomizer', randomize.exactRandomizer)
+    )
+
+# Function to run every randomizer strategy many times and report the distribution of its remainders
+def benchmarkRemainderQuality(jsonData, runs=200, seed=0):
+
+    results = []
+
+    sortedData = randomize.sortJson(jsonData)
+    priceIndex = randomize.buildPriceIndex(sortedData)
+    sampler = randomize.buildAliasSampler(priceIndex)
+
+    for total in benchmarkTotals:
+        for name, strategy in randomizerStrategies(sampler):
+            random.seed(f"{seed}-{name}-{total}")
+            remainders = [strategy('food', total, sortedData, priceIndex)['remainder'] for run in range(runs)]
+            results.append({'stage': 'remainderQuality', 'strategy': name, 'items': len(jsonData), 'total': total, **remainderDistribution(remainders)})
+
+    return results
+
+# End of benchmarkRemainderQuality
+
+# Function to approximate the chance of a chi-square statistic at least this large, Wilson-Hilferty normal approximation
+def chiSquarePValue(statistic, degreesOfFreedom):
+
+    if degreesOfFreedom <= 0:
+        return 1.0
+
+    spread = 2 / (9 * degreesOfFreedom)
+    z = ((statistic / degreesOfFreedom) ** (1 / 3) - (1 - spread)) / math.sqrt(spread)
+
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+# End of chiSquarePValue
+
+# Function to check that the bisect and alias samplers both draw items in proportion to their price, with a chi-square test per cap
+def benchmarkSamplerDistribution(jsonData, draws=100000, seed=0, caps=(150, 1000, 4000)):
+
+    results = []
+
+    sortedData = randomize.sortJson(jsonData)
+    priceIndex = randomize.buildPriceIndex(sortedData)
+    sampler = randomize.buildAliasSampler(priceIndex)
+    prices = priceIndex['prices']
+
+    for capCents in caps:
+
+        cutoff = bisect.bisect_left(prices, capCents)
+        if cutoff == 0:
+            continue
+        totalWeight = priceIndex['cumulative'][cutoff - 1]
+
+        # Items are grouped into 25 cent price bins so every bin expects plenty of draws
+        expected = {}
+        for index in range(cutoff):
+            priceBin = prices[index] // 25
+            expected[priceBin] = expected.get(priceBin, 0) + prices[index] / totalWeight * draws
+
+        for name, select in (('selectIndex', lambda: randomize.selectIndex(capCents, priceIndex)), ('aliasSelectIndex', lambda: randomize.aliasSelectIndex(capCents, sampler))):
+            random.seed(f"{seed}-{name}-{capCents}")
+            observed = {}
+            for draw in range(draws):
+                priceBin = prices[select()] // 25
+                observed[priceBin] = observed.get(priceBin, 0) + 1
+
+            bins = [priceBin for priceBin in expected if expected[priceBin] > 0]
+            statistic = sum((observed.get(priceBin, 0) - expected[priceBin]) ** 2 / expected[priceBin] for priceBin in bins)
+            outside = sum(count for priceBin, count in observed.items() if priceBin not in expected)
+            results.append({'stage': 'samplerDistribution', 'sampler': name, 'items': len(jsonData), 'capCents': capCents, 'draws': draws, 'chiSquare': round(statistic, 2), 'degreesOfFreedom': len(bins) - 1, 'pValue': round(chiSquarePValue(statistic, len(bins) - 1), 4), 'drawsOverCap': outside})
+
+    return results
+
+# End of benchmarkSamplerDistribution
+
+# Function to measure master list rendering time, memory and file size against the inline style baseline
+def benchmarkMasterList(jsonData, directory, repeat=3):
+
+    results = []
+    filePath = os.path.join(directory, 'masterList.html')
+
+    for name, render in (
+        ('masterList', lambda: pages.writeMasterList('food', jsonData, None, directory)),
+        ('masterListInlineStyles', lambda: pages.writeChunks(filePath, inlineStyleMasterListChunks('food', jsonData)))
+    ):
+        measurement = measureStage(render, repeat)
+        size = os.path.getsize(filePath)
+        results.append({'stage': name, 'items': len(jsonData), **measurement, 'bytes': size, 'bytesPerItem': round(size / max(1, len(jsonData)), 1)})
+
+    return results
+
+# End of benchmarkMasterList
+
+# Function to measure transaction sheet rendering time, memory and size for a typical transaction
+def benchmarkTransactionSheet(jsonData, directory, itemCount=40, repeat=3):
+
+    selectedItems = jsonData[:itemCount]
+    filePath = os.path.join(directory, 'selectedItems.html')
+
+    # Same page htmlBuilder writes, pointed at the temporary directory
+    def render():
+        pages.writeChunks(filePath, [pages.pageHead("food Items List"), *pages.transactionChunks('food', 300, selectedItems, 0.0), "</body></html>"])
+
+    measurement = measureStage(render, repeat)
+
+    return [{'stage': 'transactionSheet', 'items': len(selectedItems), **measurement, 'bytes': os.path.getsize(filePath)}]
+
+# End of benchmarkTransactionSheet
+
+# Function to measure how long a fresh interpreter takes to import each program module
+def benchmarkColdStart(repeat=5):
+
+    results = []
+    sourceDirectory = os.path.dirname(os.path.abspath(__file__))
+
+    # A bare interpreter start is the floor every module import is compared against
+    for moduleName in (None, 'manage', 'randomize'):
+        command = [sys.executable, '-c', f"import {moduleName}" if moduleName else "pass"]
+        milliseconds = timeStage(lambda: subprocess.run(command, cwd=sourceDirectory, check=True), repeat)
+        results.append({'stage': 'coldStart', 'module': moduleName or 'interpreter', 'milliseconds': milliseconds})
+
+    return results
+
+# End of benchmarkColdStart
+
+# Function to describe the machine and interpreter a run was measured on
+def runInformation(args):
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'sizes': args.sizes,
+        'repeat': args.repeat,
+        'runs': args.runs,
+        'seed': args.seed,
+        'startedAt': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+# Function to print how each timed stage changed against the results of an earlier run
+def compareResults(results, baselinePath):
+
+    with open(baselinePath, 'r') as baselineFile:
+        baseline = json.load(baselineFile)
+
+    # Older result files are a bare list
+    if isinstance(baseline, dict):
+        baseline = baseline['results']
+
+    def resultKey(result):
+        return (result['stage'], result.get('items'), result.get('module'), result.get('strategy'), result.get('total'), result.get('sampler'), result.get('capCents'))
+
+    baselineResults = {resultKey(result): result for result in baseline}
+
+    for result in results:
+        previous = baselineResults.get(resultKey(result))
+        if previous is None or 'milliseconds' not in result or not previous.get('milliseconds'):
+            continue
+        ratio = result['milliseconds'] / previous['milliseconds']
+        print(json.dumps({'stage': result['stage'], 'items': result.get('items'), 'total': result.get('total'), 'milliseconds': result['milliseconds'], 'baselineMilliseconds': previous['milliseconds'], 'ratio': round(ratio, 3)}))
+
+# End of compareResults
+
+##################################################################
+# Main launcher runs every stage for every catalog size
+##################################################################
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Benchmark the catalog, randomizer and html stages")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000], help="synthetic catalog sizes, up to 1000000")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage, the best one is reported")
+    parser.add_argument('--runs', type=int, default=200, help="randomizer runs per strategy and total for the remainder distribution")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic catalogs")
+    parser.add_argument('--no-cold-start', action='store_true', help="skip timing fresh interpreter imports")
+    parser.add_argument('--output', '-o', help="also save the results to this json file")
+    parser.add_argument('--compare', help="json file of an earlier run to compare the timings against")
+    args = parser.parse_args(argv)
+
+    results = []
+
+    def report(stageResults):
+        for result in stageResults:
+            print(json.dumps(result), flush=True)
+            results.append(result)
+
+    if not args.no_cold_start:
+        report(benchmarkColdStart())
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            jsonData = syntheticCatalog(size, args.seed)
+            report(benchmarkCatalogIo(jsonData, directory, args.repeat))
+            report(benchmarkCatalogMemory(jsonData))
+            report(benchmarkRandomizer(jsonData, args.repeat))
+            report(benchmarkTax(jsonData, args.repeat))
+            report(benchmarkRemainderQuality(jsonData, args.runs, args.seed))
+            report(benchmarkSamplerDistribution(jsonData, seed=args.seed))
+            report(benchmarkMasterList(jsonData, directory, args.repeat))
+            report(benchmarkTransactionSheet(jsonData, directory, repeat=args.repeat))
+
+    if args.output:
+        with open(args.output, 'w') as outputFile:
+            json.dump({'run': runInformation(args), 'results': results}, outputFile, indent=2)
+
+    if args.compare:
+        compareResults(results, args.compare)
+
+if __name__ == '__main__':
+    main()
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -0,0 +1,343 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Bulk import and export
+#
+# Reads price change files as CSV, JSONL or a JSON list one record at a
+# time and merges them into the catalog in a single pass. Every record is
+# checked with the same validation rules as the menus and gets its
+# fullPrice computed, then each category touched is saved once. Records
+# that cannot be parsed or fail validation are reported with their record
+# number and skipped, the others are still saved. Example CSV input...
+#
+#   op,category,skuNum,name,price,taxable
+#   ,food,012345678901,Apple juice,2.99,N
+#   delete,,012345678902,,,
+#
+# The op field is 'upsert' when left empty, or 'add', 'update' or
+# 'delete'. Update and delete records only need skuNum and the fields to
+# change, and search every category when the category is left out. They
+# also find an item by the first 10 or more digits of its sku, while an
+# upsert only updates the item with exactly its sku and adds it otherwise,
+# and an add of a sku already in its category is refused.
+# An optional stock column sets how many units of an item are in stock.
+#
+# Exports stream every item of the chosen categories out as CSV or JSONL
+# in the same layout, so an export can be edited and imported again.
+#
+###########################################################################
+
+import collections
+import csv
+import itertools
+import json
+import os
+
+import catalog
+import manage
+import tax
+
+# Operations a record can ask for
+recordOperations = ('upsert', 'add', 'update', 'delete')
+
+# Columns of exported files, the category first then every item field
+exportFields = ('category',) + catalog.itemFields + catalog.optionalItemFields
+
+# Stands in for a record of a bulk file that could not be parsed, reported and skipped like one that fails validation
+class RecordError(ValueError):
+    pass
+
+############################################################################################
+# Reader functions that stream records out of bulk files
+############################################################################################
+
+# Function to work out the format of a bulk file from its name, or from its first line when it has none
+def detectFormat(filePath, firstLine=''):
+
+    extension = os.path.splitext(filePath)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.json':
+        return 'json'
+
+    firstLine = firstLine.lstrip()
+    if firstLine.startswith('['):
+        return 'json'
+    if firstLine.startswith('{'):
+        return 'jsonl'
+    return 'csv'
+
+# End of detectFormat
+
+# Function to yield the records of an open bulk file one at a time, only a json list is read whole
+# (a line that cannot be parsed is yielded as a RecordError, so the records around it still get applied)
+def readRecords(inputFile, fileFormat=None, filePath=''):
+
+    # Peek at the first line so stdin and unnamed files can be recognised
+    firstLine = inputFile.readline()
+    lines = itertools.chain([firstLine], inputFile)
+
+    if fileFormat is None:
+        fileFormat = detectFormat(filePath, firstLine)
+
+    if fileFormat == 'csv':
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                row = RecordError(f"Unreadable row: {e}")
+            yield row
+
+    elif fileFormat == 'jsonl':
+        for lineNumber, line in enumerate(lines, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield RecordError(f"Line {lineNumber}: {e}")
+
+    else:
+        try:
+            records = json.loads(''.join(lines))
+        except ValueError as e:
+            records = [RecordError(f"Not a json list: {e}")]
+        if isinstance(records, dict):
+            records = [records]
+        for record in records:
+            yield record
+
+# End of readRecords
+
+############################################################################################
+# Validation functions that check records with the same rules as the menus
+############################################################################################
+
+# Function to turn the taxable field of a record into 'TAX' or 'NO TAX'
+def parseTaxable(value):
+
+    if isinstance(value, bool):
+        return 'TAX' if value else 'NO TAX'
+
+    value = str(value).strip().upper()
+    if value in ('TAX', 'Y', 'YES', 'TRUE', '1'):
+        return 'TAX'
+    if value in ('NO TAX', 'N', 'NO', 'FALSE', '0'):
+        return 'NO TAX'
+
+    raise ValueError(f"Invalid taxable value {value!r}")
+
+# End of parseTaxable
+
+# Function to check the fields of a record, returns the cleaned fields or raises ValueError
+def recordFields(record, required=()):
+
+    fields = {}
+
+    for field in required:
+        if record.get(field) in (None, ''):
+            raise ValueError(f"Missing {field}")
+
+    if record.get('category') not in (None, ''):
+        fields['category'] = str(record['category']).strip().lower()
+        if not manage.folderCategoryValidation(fields['category']):
+            raise ValueError(f"Invalid category {record['category']!r}")
+
+    if record.get('skuNum') not in (None, ''):
+        fields['skuNum'] = str(record['skuNum']).strip()
+        if not manage.skuLengthValidation(fields['skuNum']):
+            raise ValueError(f"Invalid sku number {record['skuNum']!r}")
+
+    if record.get('name') not in (None, ''):
+        fields['name'] = str(record['name']).strip()
+        if not manage.nameLengthValidation(fields['name']):
+            raise ValueError(f"Invalid name {record['name']!r}")
+
+    if record.get('price') not in (None, ''):
+        if not manage.monetaryValueValidation(str(record['price']).strip()):
+            raise ValueError(f"Invalid price {record['price']!r}")
+        fields['price'] = manage.parsePrice(str(record['price']).strip())
+
+    if record.get('taxable') not in (None, ''):
+        fields['taxable'] = parseTaxable(record['taxable'])
+
+    if record.get('stock') not in (None, ''):
+        if not str(record['stock']).strip().isdigit():
+            raise ValueError(f"Invalid stock {record['stock']!r}")
+        fields['stock'] = int(str(record['stock']).strip())
+
+    return fields
+
+# End of recordFields
+
+############################################################################################
+# Operation functions that merge records into the catalog and stream it back out
+############################################################################################
+
+# Function to merge records into the catalog in one pass, returns counts and the errors of skipped records
+def applyRecords(records, operation='upsert', defaultCategory=None):
+
+    report = {'added': 0, 'updated': 0, 'deleted': 0, 'notFound': 0, 'errors': []}
+    categoryStates = {}
+
+    # Each category is loaded and indexed the first time a record needs it
+    def categoryState(category):
+        if category not in categoryStates:
+            try:
+                jsonData, version = catalog.loadJsonDataVersion(category)
+            except FileNotFoundError:
+                jsonData, version = [], catalog.catalogVersion(category)
+            skuCounts = collections.Counter(item['skuNum'] for item in jsonData)
+            duplicateSkus = {skuNum for skuNum, count in skuCounts.items() if count > 1}
+            categoryStates[category] = {'category': category, 'jsonData': jsonData, 'version': version, 'skuIndex': catalog.buildSkuIndex(jsonData), 'duplicateSkus': duplicateSkus, 'changed': False}
+        return categoryStates[category]
+
+    # Function to point the sku index at the next copy of a sku once one is deleted, catalogs saved before adds were checked can hold several
+    def removeSku(state, skuNum):
+        if skuNum in state['duplicateSkus']:
+            for index, item in enumerate(state['jsonData']):
+                if item is not None and item['skuNum'] == skuNum:
+                    catalog.setSkuIndex(state['skuIndex'], skuNum, index)
+                    return
+        catalog.removeSkuIndex(state['skuIndex'], skuNum)
+
+    # Function to find the category and position of a sku, searching every category like the menus do, by prefix only when asked
+    def locate(fields, byPrefix):
+        if 'category' in fields:
+            categories = [fields['category']]
+        else:
+            categories = catalog.categoryList
+        for category in categories:
+            state = categoryState(category)
+            if byPrefix:
+                index = catalog.findItemIndex(state['skuIndex'], fields['skuNum'])
+            else:
+                index = state['skuIndex']['bySku'].get(fields['skuNum'])
+            if index is not None and state['jsonData'][index] is not None:
+                return state, index
+        return None, None
+
+    for recordNumber, record in enumerate(records, start=1):
+        try:
+
+            if isinstance(record, RecordError):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError(f"Not a record {record!r}")
+
+            recordOperation = str(record.get('op') or operation).strip().lower()
+            if recordOperation not in recordOperations:
+                raise ValueError(f"Invalid operation {recordOperation!r}")
+
+            fields = recordFields(record, ('skuNum',))
+            if defaultCategory and 'category' not in fields:
+                fields['category'] = defaultCategory
+
+            # Adds only look for the exact sku in their own category, same as the add menu, and an upsert of a new sku must not land on an item it is the prefix of
+            if recordOperation == 'add':
+                state, index = None, None
+            else:
+                state, index = locate(fields, byPrefix=recordOperation in ('update', 'delete'))
+
+            # Deleted items leave a hole until the save, so the indexes of the others stay valid, and their sku is free again
+            if recordOperation == 'delete':
+                if state is None:
+                    report['notFound'] += 1
+                    raise ValueError(f"Item {fields['skuNum']} was not found")
+                skuNum = state['jsonData'][index]['skuNum']
+                state['jsonData'][index] = None
+                removeSku(state, skuNum)
+                state['changed'] = True
+                report['deleted'] += 1
+
+            # Existing items only change the fields given, with fullPrice worked out again
+            elif state is not None:
+                item = dict(state['jsonData'][index])
+                for field in ('name', 'price', 'taxable', 'stock'):
+                    if field in fields:
+                        item[field] = fields[field]
+                if 'price' in fields or 'taxable' in fields:
+                    item['fullPrice'] = tax.calculateFullPrice(item['price'], item['taxable'], state['category'])
+                state['jsonData'][index] = item
+                state['changed'] = True
+                report['updated'] += 1
+
+            elif recordOperation == 'update':
+                report['notFound'] += 1
+                raise ValueError(f"Item {fields['skuNum']} was not found")
+
+            # New items need every field
+            else:
+                fields = dict(recordFields(record, ('name', 'price', 'taxable')), **fields)
+                if 'category' not in fields:
+                    raise ValueError("Missing category")
+                state = categoryState(fields['category'])
+                if recordOperation == 'add' and fields['skuNum'] in state['skuIndex']['bySku']:
+                    raise ValueError(f"Item {fields['skuNum']} is already in the {fields['category']} database")
+                newItem = manage.buildItem(fields['name'], fields['skuNum'], fields['price'], fields['taxable'], fields.get('stock'), fields['category'])
+                catalog.setSkuIndex(state['skuIndex'], newItem['skuNum'], len(state['jsonData']))
+                state['jsonData'].append(newItem)
+                state['changed'] = True
+                report['added'] += 1
+
+        except ValueError as e:
+            report['errors'].append(f"Record {recordNumber}: {e}")
+
+    # One save per changed category, refused if another terminal saved in the meantime
+    for category, state in categoryStates.items():
+        if state['changed']:
+            jsonData = [item for item in state['jsonData'] if item is not None]
+            catalog.saveJsonData(category, jsonData, expectedVersion=state['version'])
+
+    return report
+
+# End of applyRecords
+
+# Function to stream every item of the given categories into an open file as csv or jsonl, returns the item count
+def exportRecords(outputFile, categories=None, fileFormat='csv'):
+
+    if categories is None:
+        categories = catalog.categoryList
+
+    count = 0
+
+    if fileFormat == 'csv':
+        writer = csv.DictWriter(outputFile, fieldnames=exportFields, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+
+    for category in categories:
+        try:
+            jsonData = catalog.loadJsonData(category)
+        except FileNotFoundError:
+            continue
+
+        for item in jsonData:
+            if fileFormat == 'csv':
+                writer.writerow(dict(item, category=category))
+            else:
+                outputFile.write(json.dumps(dict(item, category=category)) + "\n")
+            count += 1
+
+    return count
+
+# End of exportRecords
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
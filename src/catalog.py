@@ -0,0 +1,984 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Catalog layer shared by manage and randomize
+#
+# Loads the itemArchive json databases and builds a sku index over them,
+# a hash map for full sku numbers plus a sorted list for the "first 10 or
+# more digits" prefix lookups, so finding an item no longer means walking
+# the whole database.
+#
+# Two storage backends are available. 'json' keeps every category in its
+# itemArchive/<category>.json file. 'sqlite' keeps all categories in
+# itemArchive/catalog.db, where adding, updating or deleting an item is a
+# single row write. Choose the backend with the OTC_CATALOG_BACKEND
+# environment variable and move data between them with...
+#
+#   python catalog.py import food     (json file into sqlite)
+#   python catalog.py export food     (sqlite into json file)
+#
+# On the json backend single item changes are appended as one line each to
+# itemArchive/<category>.journal.jsonl instead of rewriting the json file.
+# Loading replays the journal over the json file. Once the journal grows
+# past journalCompactionBytes it is folded back into the json file and its
+# records move to itemArchive/<category>.audit.jsonl, which keeps the full
+# history of changes.
+#
+# Every write goes through a temporary file, fsync and atomic rename while
+# holding an advisory lock on itemArchive/<category>.lock, so several
+# register terminals can change the catalog at once. Whole database saves
+# can pass the version they loaded and fail with CatalogConflictError when
+# another terminal changed the catalog in the meantime. Single item updates
+# and deletes can pass the item they were made from and fail the same way
+# when the stored item no longer matches it. Adding an item whose full sku
+# number is already in its category fails with DuplicateItemError.
+#
+# Items are always stored in ascending order of fullPrice. Whole database
+# saves sort once, journal records are inserted at the position a binary
+# search finds and deletes remove in place, and sqlite serves the order
+# from its fullPrice index. Every load returns a PriceOrderedItems list,
+# whose priceOrdered flag lets the randomizer skip sorting until items are
+# added to it or replaced in it. Files written before this order was kept
+# are sorted once when they are loaded and again when saved.
+#
+# Loading a json database also leaves a binary parse cache of the checked
+# and ordered items in itemArchive/<category>.cache, keyed on the version
+# of the json file and journal. Later loads read the cache
+# with marshal instead of parsing json, and a cache whose key no longer
+# matches is simply built again. Set OTC_PARSE_CACHE=0 to switch it off.
+#
+###########################################################################
+
+import argparse
+import bisect
+import contextlib
+import json
+import marshal
+import operator
+import os
+import sys
+import time
+
+import metrics
+
+# Advisory file locking differs between windows and everything else
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+# Known json database categories, searched in this order
+categoryList = ['food', 'otc']
+
+# Storage backend used by manage and randomize, either 'json' or 'sqlite'
+catalogBackend = os.environ.get('OTC_CATALOG_BACKEND', 'json')
+
+# Item fields in the order they are stored
+itemFields = ('name', 'price', 'skuNum', 'taxable', 'fullPrice')
+
+# Item fields that may be left out, an item without a stock count is not stock tracked
+optionalItemFields = ('stock',)
+
+# Journal size in bytes after which it is folded back into the json file
+journalCompactionBytes = 256 * 1024
+
+# Whether json loads keep a binary parse cache next to the json file
+parseCache = os.environ.get('OTC_PARSE_CACHE', '1') != '0'
+
+# Parse cache layout number, bump it when the content of a cache changes
+parseCacheFormat = 2
+
+# Sku indexes of the json databases by category with the version and items they were built over
+skuIndexCache = {}
+
+# Raised when a whole database save finds the catalog changed since it was loaded
+class CatalogConflictError(Exception):
+    pass
+
+# Raised when a new item has the full sku number of an item already in its category
+class DuplicateItemError(CatalogConflictError):
+    pass
+
+# List of items as loaded from the catalog, in ascending order of fullPrice until items are added, replaced or reordered
+class PriceOrderedItems(list):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.priceOrdered = True
+
+    # Removing items keeps the rest in order, every other change may not
+    def append(self, item):
+        self.priceOrdered = False
+        super().append(item)
+
+    def extend(self, items):
+        self.priceOrdered = False
+        super().extend(items)
+
+    def insert(self, index, item):
+        self.priceOrdered = False
+        super().insert(index, item)
+
+    def __setitem__(self, index, item):
+        self.priceOrdered = False
+        super().__setitem__(index, item)
+
+    def __iadd__(self, items):
+        self.priceOrdered = False
+        return super().__iadd__(items)
+
+    def __imul__(self, count):
+        self.priceOrdered = False
+        return super().__imul__(count)
+
+    def sort(self, *args, **kwargs):
+        self.priceOrdered = False
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.priceOrdered = False
+        super().reverse()
+
+# End of PriceOrderedItems
+
+############################################################################################
+# Order functions that keep items in ascending order of fullPrice
+############################################################################################
+
+# Function to get the value items are ordered by
+def priceKey(item):
+    return item['fullPrice']
+
+# Function to check whether items are already in ascending order of fullPrice
+def isPriceOrdered(jsonData):
+    prices = [priceKey(item) for item in jsonData]
+    return all(map(operator.le, prices, prices[1:]))
+
+# Function to put items in ascending order of fullPrice, items of the same price keep their order
+def sortByPrice(jsonData):
+    return sorted(jsonData, key=priceKey)
+
+# Function to find where a price goes in ordered items, before or after the items of the same price
+# (a plain binary search, bisect only takes a key from Python 3.10 on)
+def pricePosition(jsonData, price, afterEqual=False):
+
+    low, high = 0, len(jsonData)
+    while low < high:
+        middle = (low + high) // 2
+        middlePrice = priceKey(jsonData[middle])
+        if middlePrice < price or (afterEqual and middlePrice == price):
+            low = middle + 1
+        else:
+            high = middle
+
+    return low
+
+# End of pricePosition
+
+# Function to insert an item into ordered items after every item of the same price
+def insertByPrice(jsonData, item):
+    jsonData.insert(pricePosition(jsonData, priceKey(item), afterEqual=True), item)
+
+# Function to remove this very item object from ordered items, looking only among the items of its price
+def removeByPrice(jsonData, item):
+
+    position = pricePosition(jsonData, priceKey(item))
+    while jsonData[position] is not item:
+        position += 1
+
+    del jsonData[position]
+
+# End of removeByPrice
+
+############################################################################################
+# File functions that locate and load the json databases
+############################################################################################
+
+# Function to establish the json file path of a category database
+def catalogPath(category):
+    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+    return os.path.join(parentDirectory, 'itemArchive', category + '.json')
+
+# Function to establish the journal file path of a category database
+def journalPath(category):
+    return catalogPath(category)[:-len('.json')] + '.journal.jsonl'
+
+# Function to establish the audit file path where compacted journal records are kept
+def auditPath(category):
+    return catalogPath(category)[:-len('.json')] + '.audit.jsonl'
+
+# Function to establish the lock file path of a category database
+def lockPath(category):
+    return catalogPath(category)[:-len('.json')] + '.lock'
+
+# Function to establish the binary parse cache path of a category database
+def parseCachePath(category):
+    return catalogPath(category)[:-len('.json')] + '.cache'
+
+############################################################################################
+# Persistence functions that make every write atomic and serialize writers
+############################################################################################
+
+# Function to replace a file with new content so readers see either the old or the new file, never a mix
+def atomicWrite(filePath, content):
+    import secrets
+
+    directory = os.path.dirname(filePath)
+    tempPath = os.path.join(directory, f".{os.path.basename(filePath)}.{secrets.token_hex(8)}.tmp")
+
+    # Created like any new file, so the umask applies without having to read it, then given the mode of the file it replaces
+    try:
+        fileMode = os.stat(filePath).st_mode & 0o7777
+    except FileNotFoundError:
+        fileMode = None
+    fileDescriptor = os.open(tempPath, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+
+    try:
+        with os.fdopen(fileDescriptor, 'w') as tempFile:
+            tempFile.write(content)
+            tempFile.flush()
+            os.fsync(tempFile.fileno())
+        if fileMode is not None:
+            os.chmod(tempPath, fileMode)
+        os.replace(tempPath, filePath)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tempPath)
+        raise
+
+    # Make the rename itself durable where directories can be synced
+    if os.name != 'nt':
+        directoryDescriptor = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directoryDescriptor)
+        finally:
+            os.close(directoryDescriptor)
+
+# End of atomicWrite
+
+# Context manager holding the advisory write lock of a category until the block ends
+@contextlib.contextmanager
+def catalogLock(category):
+
+    lockFile = open(lockPath(category), 'a+')
+
+    try:
+        if os.name == 'nt':
+
+            # msvcrt gives up after ten seconds of waiting, so keep asking until the lock is ours
+            lockFile.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lockFile.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX)
+
+        yield
+
+    finally:
+        if os.name == 'nt':
+            lockFile.seek(0)
+            with contextlib.suppress(OSError):
+                msvcrt.locking(lockFile.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(lockFile.fileno(), fcntl.LOCK_UN)
+        lockFile.close()
+
+# End of catalogLock
+
+# Function to get a value that changes whenever the stored catalog of a category changes
+def catalogVersion(category):
+
+    if catalogBackend == 'sqlite':
+        return sqliteVersion(category)
+
+    # Snapshots are replaced by rename and journals only grow until they are archived
+    try:
+        snapshotStat = os.stat(catalogPath(category))
+        snapshotVersion = (snapshotStat.st_mtime_ns, snapshotStat.st_size, snapshotStat.st_ino)
+    except FileNotFoundError:
+        snapshotVersion = None
+
+    try:
+        journalSize = os.path.getsize(journalPath(category))
+    except FileNotFoundError:
+        journalSize = 0
+
+    return (snapshotVersion, journalSize)
+
+# End of catalogVersion
+
+# Function to load a category json database from the itemArchive folder
+def loadJsonData(category):
+    return loadJsonDataVersion(category)[0]
+
+# End of loadJsonData
+
+# Function to load a category database together with the version it was loaded at
+def loadJsonDataVersion(category):
+
+    if catalogBackend == 'sqlite':
+        version = sqliteVersion(category)
+        return PriceOrderedItems(loadSqliteData(category)), version
+
+    jsonData, version = loadJsonParsed(category)
+    return PriceOrderedItems(jsonData), version
+
+# End of loadJsonDataVersion
+
+# Function to load a json database with its version, from the parse cache when it is current
+def loadJsonParsed(category):
+
+    # Reading needs no lock, a compaction in the middle of the read is detected by the version and retried
+    while True:
+        version = catalogVersion(category)
+
+        cached = readParseCache(category, version)
+        if cached is not None:
+            return cached
+
+        jsonData = loadJsonFile(category)
+        if catalogVersion(category) == version:
+            writeParseCache(category, version, jsonData)
+            return jsonData, version
+
+# End of loadJsonParsed
+
+# Function to turn a price into a number, including prices stored as text such as "1,299.99"
+def parsePrice(price):
+    return float(str(price).replace(',', ''))
+
+# Function to make sure every item has every field and numeric prices before it is ordered by price
+def checkItems(category, jsonData):
+
+    for position, item in enumerate(jsonData):
+        for field in itemFields:
+            if field not in item:
+                raise ValueError(f"Item {position} of the {category} database has no {field}")
+
+        # Older versions of manage stored the typed price text, those prices are read as the numbers they spell
+        for field in ('price', 'fullPrice'):
+            if not isinstance(item[field], (int, float)):
+                try:
+                    item[field] = parsePrice(item[field])
+                except ValueError:
+                    raise ValueError(f"Item {item['skuNum']} of the {category} database has a {field} {item[field]!r} that is not a number")
+
+# End of checkItems
+
+# Function to read the parse cache of a category, None when there is none or it was taken at another version
+@metrics.timed('parseCacheLoad', lambda result, category, version: {'category': category, 'hit': result is not None})
+def readParseCache(category, version):
+
+    if not parseCache:
+        return None
+
+    # marshal.load on a file reads it in small pieces, one read and marshal.loads is many times faster
+    try:
+        with open(parseCachePath(category), 'rb') as cacheFile:
+            key, jsonData = marshal.loads(cacheFile.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    if key != parseCacheKey(version):
+        return None
+
+    return jsonData, version
+
+# End of readParseCache
+
+# Function to write the parse cache of a category, a failed write only costs the next load its speed
+def writeParseCache(category, version, jsonData):
+
+    if not parseCache:
+        return
+
+    # The cache is rebuilt from the json file at any time, so it skips the lock and fsync of the database writes
+    tempPath = parseCachePath(category) + f".{os.getpid()}.tmp"
+
+    try:
+        with open(tempPath, 'wb') as cacheFile:
+            cacheFile.write(parseCacheContent(version, jsonData))
+        os.replace(tempPath, parseCachePath(category))
+    except (OSError, ValueError):
+        with contextlib.suppress(OSError):
+            os.remove(tempPath)
+
+# End of writeParseCache
+
+# Function to encode a parse cache of items already in price order
+def parseCacheContent(version, jsonData):
+    return marshal.dumps((parseCacheKey(version), list(jsonData)))
+
+# Function to build the key a parse cache is valid for, marshal data is only readable by the same python version
+def parseCacheKey(version):
+    return (parseCacheFormat, tuple(sys.version_info[:2]), version)
+
+# Function to write a whole category database, replacing what was stored before
+def saveJsonData(category, jsonData, expectedVersion=None):
+
+    # Sorting once here keeps the stored order for every reader, nearly free when the items are in order already
+    jsonData = sortByPrice(jsonData)
+
+    if catalogBackend == 'sqlite':
+        return saveSqliteData(category, jsonData, expectedVersion)
+
+    with catalogLock(category):
+
+        # Refuse to overwrite changes made by another terminal since this data was loaded
+        if expectedVersion is not None and catalogVersion(category) != expectedVersion:
+            raise CatalogConflictError(f"The {category} database was changed by someone else, reload and try again")
+
+        writeJsonFile(category, jsonData)
+
+# End of saveJsonData
+
+# Function to load the json file of a category in price order with its journal replayed on top
+@metrics.timed('catalogLoad', lambda result, category: {'category': category, 'items': len(result)})
+def loadJsonFile(category):
+
+    records = readJournal(category)
+
+    # Open json file for reading and load data, a journal alone is enough for a brand new category
+    try:
+        jsonFile = open(catalogPath(category), 'r')
+        jsonData = json.load(jsonFile)
+        jsonFile.close()
+    except FileNotFoundError:
+        if not records:
+            raise
+        jsonData = []
+
+    # Files saved before the price order was kept, or edited by hand, are put in order before the journal is replayed
+    checkItems(category, jsonData)
+    checkItems(category, [record['item'] for record in records if 'item' in record])
+    if not isPriceOrdered(jsonData):
+        jsonData = sortByPrice(jsonData)
+
+    if records:
+        jsonData = replayJournal(jsonData, records)
+
+    return jsonData
+
+# End of loadJsonFile
+
+# Function to write the json file of a category, which then already holds every journal record, with the lock held
+@metrics.timed('catalogSave', lambda result, category, jsonData: {'category': category, 'items': len(jsonData)})
+def writeJsonFile(category, jsonData):
+
+    # Write completed json data atomically, the journal is only archived once the data is safely in place
+    atomicWrite(catalogPath(category), json.dumps(jsonData, indent=2))
+    archiveJournal(category)
+
+# End of writeJsonFile
+
+############################################################################################
+# Journal functions that record single item changes on the json backend
+############################################################################################
+
+# Function to append one change record to the journal of a category with the lock held, compacting it once it gets large
+@metrics.timed('journalAppend', lambda result, category, record: {'category': category})
+def appendJournal(category, record):
+
+    record['time'] = time.time()
+    line = json.dumps(record) + '\n'
+
+    journalFile = open(journalPath(category), 'a+b')
+
+    # Start on a fresh line when an earlier write was torn by a crash
+    if journalFile.seek(0, os.SEEK_END) > 0:
+        journalFile.seek(-1, os.SEEK_END)
+        if journalFile.read(1) != b'\n':
+            line = '\n' + line
+
+    journalFile.write(line.encode('utf-8'))
+    journalFile.flush()
+    os.fsync(journalFile.fileno())
+    journalSize = journalFile.tell()
+    journalFile.close()
+
+    if journalSize > journalCompactionBytes:
+        compactJournal(category)
+
+# End of appendJournal
+
+# Function to read every change record in the journal of a category
+def readJournal(category):
+
+    try:
+        journalFile = open(journalPath(category), 'r')
+    except FileNotFoundError:
+        return []
+
+    records = []
+    for line in journalFile:
+
+        # A torn last line from an interrupted write is ignored
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+
+    journalFile.close()
+    return records
+
+# End of readJournal
+
+# Function to apply journal records in order to json data in price order and return the resulting json data
+def replayJournal(jsonData, records):
+
+    # Items are addressed by sku, first item wins when a sku appears twice
+    bySku = {}
+    for item in jsonData:
+        bySku.setdefault(item['skuNum'], item)
+    jsonData = list(jsonData)
+
+    for record in records:
+        operation = record['op']
+
+        # Adds of a sku that is already present change nothing, addItem refuses them so the only ones are
+        # records replayed again after a compaction was interrupted, whose later records follow them
+        if operation == 'add':
+            if record['item']['skuNum'] not in bySku:
+                bySku[record['item']['skuNum']] = record['item']
+                insertByPrice(jsonData, record['item'])
+
+        # A new price moves the item, so it is taken out and inserted again
+        elif operation == 'update':
+            existingItem = bySku.pop(record['skuNum'], None)
+            if existingItem is not None:
+                removeByPrice(jsonData, existingItem)
+                insertByPrice(jsonData, record['item'])
+                bySku.setdefault(record['item']['skuNum'], record['item'])
+
+        elif operation == 'delete':
+            existingItem = bySku.pop(record['skuNum'], None)
+            if existingItem is not None:
+                removeByPrice(jsonData, existingItem)
+
+    return jsonData
+
+# End of replayJournal
+
+# Function to move the journal records of a category onto the end of its audit file
+def archiveJournal(category):
+
+    try:
+        journalFile = open(journalPath(category), 'r')
+    except FileNotFoundError:
+        return
+
+    auditFile = open(auditPath(category), 'a')
+    auditFile.write(journalFile.read())
+    auditFile.flush()
+    os.fsync(auditFile.fileno())
+    auditFile.close()
+    journalFile.close()
+
+    os.remove(journalPath(category))
+
+# End of archiveJournal
+
+# Function to fold the journal of a category back into its json file, with the lock held
+def compactJournal(category):
+    writeJsonFile(category, loadJsonFile(category))
+
+# End of compactJournal
+
+############################################################################################
+# Item functions that change a single item, one row write on the sqlite backend
+############################################################################################
+
+# Function to find the item matching a full sku number or the first 10 or more digits of one
+def findItem(category, inputSku):
+
+    if catalogBackend == 'sqlite':
+        return findSqliteItem(category, inputSku)
+
+    jsonData, skuIndex = loadSkuIndex(category)
+    index = findItemIndex(skuIndex, inputSku)
+
+    # A copy keeps callers from changing the items the index is kept with
+    if index is None:
+        return None
+    return dict(jsonData[index])
+
+# End of findItem
+
+# Function to add a new item to a category database, after every item of the same price, returns True once added
+def addItem(category, newItem):
+
+    if catalogBackend == 'sqlite':
+        connection = connectSqlite()
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                if connection.execute("SELECT 1 FROM items WHERE category = ? AND skuNum = ? LIMIT 1", (category, newItem['skuNum'])).fetchone() is not None:
+                    raise DuplicateItemError(f"Item {newItem['skuNum']} is already in the {category} database, update it instead")
+                connection.execute("INSERT INTO items (category, name, price, skuNum, taxable, fullPrice, stock) VALUES (?, ?, ?, ?, ?, ?, ?)", sqliteRow(category, newItem))
+                bumpSqliteVersion(connection, category)
+        finally:
+            connection.close()
+        return True
+
+    # The sku is checked and the item recorded under one lock, so two terminals cannot add the same sku
+    with catalogLock(category):
+        try:
+            jsonData, skuIndex = loadSkuIndex(category)
+        except FileNotFoundError:
+            skuIndex = buildSkuIndex([])
+        if newItem['skuNum'] in skuIndex['bySku']:
+            raise DuplicateItemError(f"Item {newItem['skuNum']} is already in the {category} database, update it instead")
+        appendJournal(category, {'op': 'add', 'item': newItem})
+    return True
+
+# End of addItem
+
+# Function to replace the item with the given full sku number, returns False when it is no longer there
+def updateItem(category, skuNum, updatedItem, expectedItem=None):
+
+    if catalogBackend == 'sqlite':
+        connection = connectSqlite()
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                rowid = checkSqliteItem(connection, category, skuNum, expectedItem)
+                if rowid is None:
+                    return False
+                connection.execute("UPDATE items SET name = ?, price = ?, skuNum = ?, taxable = ?, fullPrice = ?, stock = ? WHERE rowid = ?", sqliteRow(category, updatedItem)[1:] + (rowid,))
+                bumpSqliteVersion(connection, category)
+        finally:
+            connection.close()
+        return True
+
+    # The item is checked and the change recorded under one lock, so no other terminal can come in between
+    with catalogLock(category):
+        if not checkJsonItem(category, skuNum, expectedItem):
+            return False
+        appendJournal(category, {'op': 'update', 'skuNum': skuNum, 'item': updatedItem})
+    return True
+
+# End of updateItem
+
+# Function to delete the item with the given full sku number, returns False when it is no longer there
+def deleteItem(category, skuNum, expectedItem=None):
+
+    if catalogBackend == 'sqlite':
+        connection = connectSqlite()
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                rowid = checkSqliteItem(connection, category, skuNum, expectedItem)
+                if rowid is None:
+                    return False
+                connection.execute("DELETE FROM items WHERE rowid = ?", (rowid,))
+                bumpSqliteVersion(connection, category)
+        finally:
+            connection.close()
+        return True
+
+    with catalogLock(category):
+        if not checkJsonItem(category, skuNum, expectedItem):
+            return False
+        appendJournal(category, {'op': 'delete', 'skuNum': skuNum})
+    return True
+
+# End of deleteItem
+
+# Function to check the stored item of a full sku number against the one a change was made from, with the lock held
+def checkJsonItem(category, skuNum, expectedItem):
+
+    jsonData, skuIndex = loadSkuIndex(category)
+    index = skuIndex['bySku'].get(skuNum)
+
+    # Gone means another terminal deleted it, different means another terminal changed it first
+    if index is None:
+        return False
+    if expectedItem is not None and jsonData[index] != expectedItem:
+        raise CatalogConflictError(f"Item {skuNum} of the {category} database was changed by someone else, look it up and try again")
+
+    return True
+
+# End of checkJsonItem
+
+############################################################################################
+# Sqlite functions used by the sqlite backend
+############################################################################################
+
+# Function to establish the sqlite database path shared by every category
+def sqlitePath():
+    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+    return os.path.join(parentDirectory, 'itemArchive', 'catalog.db')
+
+# Function to open the sqlite database in write-ahead log mode, creating the table and indexes when needed
+def connectSqlite():
+    import sqlite3
+
+    connection = sqlite3.connect(sqlitePath(), timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+
+    with connection:
+        connection.execute("CREATE TABLE IF NOT EXISTS items (category TEXT NOT NULL, name TEXT, price REAL, skuNum TEXT NOT NULL, taxable TEXT, fullPrice REAL, stock INTEGER)")
+
+        # Databases created before the stock count get the column added, empty for every item
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(items)")]
+        if 'stock' not in columns:
+            connection.execute("ALTER TABLE items ADD COLUMN stock INTEGER")
+
+        connection.execute("CREATE INDEX IF NOT EXISTS itemsBySku ON items (category, skuNum)")
+        connection.execute("CREATE INDEX IF NOT EXISTS itemsByFullPrice ON items (category, fullPrice)")
+        connection.execute("CREATE TABLE IF NOT EXISTS versions (category TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    return connection
+
+# End of connectSqlite
+
+# Function to turn an item into a row of column values, starting with its category, optional fields left empty
+def sqliteRow(category, item):
+    return (category,) + tuple(item[field] for field in itemFields) + tuple(item.get(field) for field in optionalItemFields)
+
+# Function to turn a row of column values back into an item, leaving out empty optional fields
+def sqliteItem(row):
+    item = dict(zip(itemFields, row))
+    for field, value in zip(optionalItemFields, row[len(itemFields):]):
+        if value is not None:
+            item[field] = value
+    return item
+
+# Function to count a change to a category inside the open transaction
+def bumpSqliteVersion(connection, category):
+    connection.execute("INSERT OR IGNORE INTO versions (category, version) VALUES (?, 0)", (category,))
+    connection.execute("UPDATE versions SET version = version + 1 WHERE category = ?", (category,))
+
+# Function to find the row of a full sku number inside the open write transaction and check it against the item a change was made from
+def checkSqliteItem(connection, category, skuNum, expectedItem):
+
+    row = connection.execute("SELECT rowid, name, price, skuNum, taxable, fullPrice, stock FROM items WHERE category = ? AND skuNum = ? ORDER BY fullPrice, rowid LIMIT 1", (category, skuNum)).fetchone()
+
+    if row is None:
+        return None
+    if expectedItem is not None and sqliteItem(row[1:]) != expectedItem:
+        raise CatalogConflictError(f"Item {skuNum} of the {category} database was changed by someone else, look it up and try again")
+
+    return row[0]
+
+# End of checkSqliteItem
+
+# Function to read the change counter of a category
+def sqliteVersion(category):
+
+    connection = connectSqlite()
+    row = connection.execute("SELECT version FROM versions WHERE category = ?", (category,)).fetchone()
+    connection.close()
+
+    if row is None:
+        return 0
+    return row[0]
+
+# End of sqliteVersion
+
+# Function to load every item of a category in price order
+@metrics.timed('catalogLoad', lambda result, category: {'category': category, 'items': len(result), 'backend': 'sqlite'})
+def loadSqliteData(category):
+
+    # The fullPrice index serves the price order directly, items of the same price in the order they were written
+    connection = connectSqlite()
+    rows = connection.execute("SELECT name, price, skuNum, taxable, fullPrice, stock FROM items WHERE category = ? ORDER BY fullPrice, rowid", (category,)).fetchall()
+    connection.close()
+
+    return [sqliteItem(row) for row in rows]
+
+# End of loadSqliteData
+
+# Function to replace every item of a category in one transaction
+@metrics.timed('catalogSave', lambda result, category, jsonData, expectedVersion=None: {'category': category, 'items': len(jsonData), 'backend': 'sqlite'})
+def saveSqliteData(category, jsonData, expectedVersion=None):
+
+    connection = connectSqlite()
+
+    try:
+        with connection:
+
+            # Compare and bump the version in one statement so two terminals cannot both pass the check
+            if expectedVersion is not None:
+                connection.execute("INSERT OR IGNORE INTO versions (category, version) VALUES (?, 0)", (category,))
+                cursor = connection.execute("UPDATE versions SET version = version + 1 WHERE category = ? AND version = ?", (category, expectedVersion))
+                if cursor.rowcount == 0:
+                    raise CatalogConflictError(f"The {category} database was changed by someone else, reload and try again")
+            else:
+                bumpSqliteVersion(connection, category)
+
+            connection.execute("DELETE FROM items WHERE category = ?", (category,))
+            connection.executemany("INSERT INTO items (category, name, price, skuNum, taxable, fullPrice, stock) VALUES (?, ?, ?, ?, ?, ?, ?)", (sqliteRow(category, item) for item in jsonData))
+
+    finally:
+        connection.close()
+
+# End of saveSqliteData
+
+# Function to find an item by full sku number or sku prefix using the sku index
+def findSqliteItem(category, inputSku):
+
+    connection = connectSqlite()
+
+    # Full sku numbers first, then the first item in price order whose sku starts with the given digits
+    row = connection.execute("SELECT name, price, skuNum, taxable, fullPrice, stock FROM items WHERE category = ? AND skuNum = ? ORDER BY fullPrice, rowid LIMIT 1", (category, inputSku)).fetchone()
+    if row is None:
+        row = connection.execute("SELECT name, price, skuNum, taxable, fullPrice, stock FROM items WHERE category = ? AND skuNum >= ? AND skuNum < ? ORDER BY fullPrice, rowid LIMIT 1", (category, inputSku, inputSku + '\uffff')).fetchone()
+
+    connection.close()
+
+    if row is None:
+        return None
+    return sqliteItem(row)
+
+# End of findSqliteItem
+
+# Function to copy a category json file into the sqlite database, replacing the category there
+def importJsonToSqlite(category):
+
+    jsonData = loadJsonFile(category)
+    saveSqliteData(category, jsonData)
+    return len(jsonData)
+
+# End of importJsonToSqlite
+
+# Function to copy a category from the sqlite database into its json file, replacing the file
+def exportSqliteToJson(category):
+
+    jsonData = loadSqliteData(category)
+
+    with catalogLock(category):
+        writeJsonFile(category, jsonData)
+
+    return len(jsonData)
+
+# End of exportSqliteToJson
+
+############################################################################################
+# Index functions that find items by sku number
+############################################################################################
+
+# Function to build a sku index over json data, mapping sku numbers to item indexes
+def buildSkuIndex(jsonData):
+
+    bySku = {}
+
+    # First item wins when a sku appears twice, same as a front to back scan
+    for index, item in enumerate(jsonData):
+        bySku.setdefault(item['skuNum'], index)
+
+    # Sorted sku numbers allow a binary search for every sku starting with a prefix
+    sortedSkus = sorted(bySku)
+
+    return {'bySku': bySku, 'sortedSkus': sortedSkus}
+
+# End of buildSkuIndex
+
+# Function to point a sku index at the item now holding a sku number
+def setSkuIndex(skuIndex, skuNum, index):
+
+    if skuNum not in skuIndex['bySku']:
+        bisect.insort(skuIndex['sortedSkus'], skuNum)
+    skuIndex['bySku'][skuNum] = index
+
+# Function to take a sku number out of a sku index once its item is gone
+def removeSkuIndex(skuIndex, skuNum):
+
+    if skuIndex['bySku'].pop(skuNum, None) is not None:
+        sortedSkus = skuIndex['sortedSkus']
+        del sortedSkus[bisect.bisect_left(sortedSkus, skuNum)]
+
+# End of removeSkuIndex
+
+# Function to get the items of a json database with their sku index, built once per catalog version
+def loadSkuIndex(category):
+
+    # Two stat calls tell whether the index kept from an earlier lookup still matches the files
+    cached = skuIndexCache.get(category)
+    if cached is not None and cached[0] == catalogVersion(category):
+        return cached[1], cached[2]
+
+    jsonData, version = loadJsonDataVersion(category)
+    skuIndex = buildSkuIndex(jsonData)
+    skuIndexCache[category] = (version, jsonData, skuIndex)
+
+    return jsonData, skuIndex
+
+# End of loadSkuIndex
+
+# Function to list the indexes of all items whose sku number starts with the given digits
+def findItemIndexes(skuIndex, inputSku):
+
+    bySku = skuIndex['bySku']
+    sortedSkus = skuIndex['sortedSkus']
+
+    indexes = []
+    position = bisect.bisect_left(sortedSkus, inputSku)
+
+    while position < len(sortedSkus) and sortedSkus[position].startswith(inputSku):
+        indexes.append(bySku[sortedSkus[position]])
+        position += 1
+
+    return sorted(indexes)
+
+# End of findItemIndexes
+
+# Function to find the index of the item matching a full sku number or the first 10 or more digits of one
+def findItemIndex(skuIndex, inputSku):
+
+    # Full sku numbers are a single hash lookup
+    index = skuIndex['bySku'].get(inputSku)
+    if index is not None:
+        return index
+
+    # Otherwise the first item in database order whose sku starts with the given digits
+    indexes = findItemIndexes(skuIndex, inputSku)
+    if indexes:
+        return indexes[0]
+
+    return None
+
+# End of findItemIndex
+
+##################################################################
+# Main launcher moves data between the json and sqlite backends
+##################################################################
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Move item databases between json files and sqlite")
+    parser.add_argument('action', choices=('import', 'export'), help="import json into sqlite or export sqlite to json")
+    parser.add_argument('categories', nargs='*', default=categoryList, help="categories to move, defaults to all")
+    args = parser.parse_args(argv)
+
+    for category in args.categories:
+        if args.action == 'import':
+            count = importJsonToSqlite(category)
+            print(f"  Imported {count} {category} items into {sqlitePath()}")
+        else:
+            count = exportSqliteToJson(category)
+            print(f"  Exported {count} {category} items into {catalogPath(category)}")
+
+if __name__ == '__main__':
+    main()
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
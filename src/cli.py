@@ -0,0 +1,299 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Scriptable command line
+#
+# Runs the manage and randomize operations without any prompts, so they
+# can be called from scripts and pipelines. Add, update and delete take a
+# single item from the options or many items from a JSON or CSV file,
+# where every category touched is loaded once and saved once.
+#
+# Usage: python cli.py add --category food --name "Apple juice" --sku 012345678901 --price 2.99
+#        python cli.py update --file priceChanges.csv
+#        python cli.py import priceChanges.csv
+#        python cli.py export --format jsonl -o catalog.jsonl
+#        python cli.py randomize --category otc --total 45.50 --exact
+#        python cli.py retax --profile default --dry-run
+#
+# Bulk files hold one record per item with the fields category, name,
+# skuNum, price and taxable, see bulk.py for the details.
+#
+###########################################################################
+
+import argparse
+import sys
+
+import bulk
+import catalog
+import manage
+import metrics
+import tax
+
+############################################################################################
+# Command functions run one subcommand each
+############################################################################################
+
+# Function to print the report of applied records, returns the exit status
+def printReport(report):
+
+    print(f"{report['added']} added, {report['updated']} updated, {report['deleted']} deleted, {report['notFound']} not found")
+    for error in report['errors']:
+        print(error, file=sys.stderr)
+
+    if report['errors']:
+        return 1
+    return 0
+
+# End of printReport
+
+# Function to read every record of a bulk file, '-' for stdin
+def readFileRecords(filePath, fileFormat=None):
+
+    if filePath == '-':
+        return list(bulk.readRecords(sys.stdin, fileFormat))
+
+    with open(filePath, 'r', newline='') as inputFile:
+        return list(bulk.readRecords(inputFile, fileFormat, filePath))
+
+# End of readFileRecords
+
+# Function to collect the records of an add, update or delete command from its file or options
+def commandRecords(args):
+
+    if args.file:
+        return readFileRecords(args.file)
+
+    record = {'category': args.category, 'skuNum': args.sku}
+    for field in ('name', 'price', 'taxable', 'stock'):
+        if getattr(args, field, None) is not None:
+            record[field] = getattr(args, field)
+
+    return [record]
+
+# End of commandRecords
+
+def commandAdd(args):
+    return printReport(bulk.applyRecords(commandRecords(args), 'add'))
+
+def commandUpdate(args):
+    return printReport(bulk.applyRecords(commandRecords(args), 'update'))
+
+def commandDelete(args):
+    return printReport(bulk.applyRecords(commandRecords(args), 'delete'))
+
+# Function to merge a csv, jsonl or json file of upserts and deletes into the catalog, streamed record by record
+def commandImport(args):
+
+    if args.file == '-':
+        return printReport(bulk.applyRecords(bulk.readRecords(sys.stdin, args.format), args.op, args.category))
+
+    with open(args.file, 'r', newline='') as inputFile:
+        return printReport(bulk.applyRecords(bulk.readRecords(inputFile, args.format, args.file), args.op, args.category))
+
+# End of commandImport
+
+# Function to stream the catalog out as csv or jsonl
+def commandExport(args):
+
+    categories = [args.category] if args.category else None
+
+    if args.output is None or args.output == '-':
+        count = bulk.exportRecords(sys.stdout, categories, args.format)
+    else:
+        with open(args.output, 'w', newline='') as outputFile:
+            count = bulk.exportRecords(outputFile, categories, args.format)
+
+    print(f"{count} items exported", file=sys.stderr)
+
+    return 0
+
+# End of commandExport
+
+# Function to write a category back in price order and fetch or render its missing barcode images
+def commandSync(args):
+
+    jsonData = manage.sortDatabase(args.category)
+
+    source = 'local' if args.local else None
+    syncReport = manage.syncBarcodes(jsonData, args.category, incremental=not args.full, source=source)
+    results = syncReport['results']
+    failedResults = [result for result in results if not result['ok']]
+
+    print(f"{len(results) - len(failedResults)} of {len(results)} barcode images synced, {syncReport['skipped']} already up to date, {syncReport['pruned']} removed")
+    for result in failedResults:
+        print(f"Failed {result['skuNum']} after {result['attempts']} attempt(s): {result['error']}", file=sys.stderr)
+
+    if failedResults:
+        return 1
+    return 0
+
+# End of commandSync
+
+# Function to write the master list of a category
+def commandMasterList(args):
+    import pages
+
+    writtenPaths = pages.writeMasterList(args.category, catalog.loadJsonData(args.category), args.per_page, mode=args.images)
+    for writtenPath in writtenPaths:
+        print(writtenPath)
+
+    return 0
+
+# End of commandMasterList
+
+# Function to generate one random transaction and write its html sheet
+def commandRandomize(args):
+    import randomize
+
+    jsonData = catalog.loadJsonData(args.category)
+    if args.tax_profile:
+        jsonData = tax.repriceItems(jsonData, args.category, args.tax_profile)
+    priceIndex = randomize.buildPriceIndex(jsonData)
+
+    if args.exact:
+        itemAndRemainder = randomize.exactRandomizer(args.category, args.total, jsonData, priceIndex)
+    else:
+        itemAndRemainder = randomize.bestRandomizer(args.category, args.total, jsonData, priceIndex)
+
+    htmlFilePath = randomize.htmlBuilder(args.category, args.total, itemAndRemainder['selectedItems'], itemAndRemainder['remainder'], mode=args.images)
+
+    print(f"{len(itemAndRemainder['selectedItems'])} items, remainder {round(itemAndRemainder['remainder'], 2)}")
+    print(htmlFilePath)
+
+    return 0
+
+# End of commandRandomize
+
+# Function to work out every full price again under a tax profile and store the ones that changed
+def commandRetax(args):
+
+    categories = [args.category] if args.category else catalog.categoryList
+
+    for category in categories:
+        try:
+            changed, count = tax.recomputeCategory(category, args.profile, dryRun=args.dry_run)
+        except FileNotFoundError:
+            continue
+        print(f"{category}: {changed} of {count} full prices {'would change' if args.dry_run else 'changed'}")
+
+    return 0
+
+# End of commandRetax
+
+##################################################################
+# Main launcher parses the command line and runs the subcommand
+##################################################################
+
+# Argument type for prices given on the command line
+def priceArgument(value):
+    if not manage.monetaryValueValidation(value):
+        raise argparse.ArgumentTypeError(f"invalid price {value!r}")
+    return manage.parsePrice(value)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Manage the item databases and generate transactions without prompts")
+    metrics.addArguments(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    categoryChoices = tuple(catalog.categoryList)
+    imageChoices = ('link', 'inline', 'svg')
+
+    addParser = subparsers.add_parser('add', help="add items")
+    addParser.add_argument('--file', '-f', help="json or csv file of items to add, '-' for stdin")
+    addParser.add_argument('--category', choices=categoryChoices)
+    addParser.add_argument('--name')
+    addParser.add_argument('--sku')
+    addParser.add_argument('--price')
+    addParser.add_argument('--taxable', help="TAX, NO TAX, Y or N")
+    addParser.add_argument('--stock', help="units in stock, leave out for items that are not stock tracked")
+    addParser.set_defaults(function=commandAdd)
+
+    updateParser = subparsers.add_parser('update', help="update items found by sku number")
+    updateParser.add_argument('--file', '-f', help="json or csv file of changes, '-' for stdin")
+    updateParser.add_argument('--category', choices=categoryChoices, help="defaults to searching every category")
+    updateParser.add_argument('--sku', help="the first 10 or more digits of the sku number")
+    updateParser.add_argument('--name')
+    updateParser.add_argument('--price')
+    updateParser.add_argument('--taxable', help="TAX, NO TAX, Y or N")
+    updateParser.add_argument('--stock', help="units in stock")
+    updateParser.set_defaults(function=commandUpdate)
+
+    deleteParser = subparsers.add_parser('delete', help="delete items found by sku number")
+    deleteParser.add_argument('--file', '-f', help="json or csv file of sku numbers, '-' for stdin")
+    deleteParser.add_argument('--category', choices=categoryChoices, help="defaults to searching every category")
+    deleteParser.add_argument('--sku', help="the first 10 or more digits of the sku number")
+    deleteParser.set_defaults(function=commandDelete)
+
+    importParser = subparsers.add_parser('import', help="merge a csv, jsonl or json file of item changes into the databases")
+    importParser.add_argument('file', help="file of item records, '-' for stdin")
+    importParser.add_argument('--format', choices=('csv', 'jsonl', 'json'), default=None, help="defaults to the file extension")
+    importParser.add_argument('--op', choices=bulk.recordOperations, default='upsert', help="operation of records without an op field")
+    importParser.add_argument('--category', choices=categoryChoices, help="category of records without a category field")
+    importParser.set_defaults(function=commandImport)
+
+    exportParser = subparsers.add_parser('export', help="write every item out as csv or jsonl")
+    exportParser.add_argument('--output', '-o', help="output file, defaults to stdout")
+    exportParser.add_argument('--format', choices=('csv', 'jsonl'), default='csv')
+    exportParser.add_argument('--category', choices=categoryChoices, help="defaults to every category")
+    exportParser.set_defaults(function=commandExport)
+
+    syncParser = subparsers.add_parser('sync', help="sort a database and sync its barcode images")
+    syncParser.add_argument('--category', choices=categoryChoices, required=True)
+    syncParser.add_argument('--full', action='store_true', help="re-download every barcode image")
+    syncParser.add_argument('--local', action='store_true', help="render barcode images offline")
+    syncParser.set_defaults(function=commandSync)
+
+    masterListParser = subparsers.add_parser('masterlist', help="write the master list of a database")
+    masterListParser.add_argument('--category', choices=categoryChoices, required=True)
+    masterListParser.add_argument('--per-page', type=int, default=None, help="split the list into pages of this many items")
+    masterListParser.add_argument('--images', choices=imageChoices, default=None, help="link barcode images or embed them in the html page")
+    masterListParser.set_defaults(function=commandMasterList)
+
+    randomizeParser = subparsers.add_parser('randomize', help="generate a random transaction")
+    randomizeParser.add_argument('--category', choices=categoryChoices, required=True)
+    randomizeParser.add_argument('--total', type=priceArgument, required=True)
+    randomizeParser.add_argument('--exact', action='store_true', help="use the exact total solver")
+    randomizeParser.add_argument('--images', choices=imageChoices, default=None, help="link barcode images or embed them in the html page")
+    randomizeParser.add_argument('--tax-profile', default=None, help="draw against full prices of this tax profile instead of the stored ones")
+    randomizeParser.set_defaults(function=commandRandomize)
+
+    retaxParser = subparsers.add_parser('retax', help="work out every full price again under a tax profile")
+    retaxParser.add_argument('--category', choices=categoryChoices, help="defaults to every category")
+    retaxParser.add_argument('--profile', default=None, help="tax profile to price with, defaults to OTC_TAX_PROFILE or 'default'")
+    retaxParser.add_argument('--dry-run', action='store_true', help="only count the full prices that would change")
+    retaxParser.set_defaults(function=commandRetax)
+
+    args = parser.parse_args(argv)
+
+    # Single item commands need a sku number unless a file is given
+    if args.command in ('add', 'update', 'delete') and not args.file and not args.sku:
+        parser.error(f"{args.command} needs --sku or --file")
+
+    metrics.configure(args)
+
+    try:
+        with metrics.run(f"cli {args.command}"):
+            return args.function(args)
+    except (catalog.CatalogConflictError, tax.TaxProfileError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
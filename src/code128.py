@@ -0,0 +1,207 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Offline Code128 barcode renderer
+#
+# Encodes a sku number as Code128 and writes it as a PNG or SVG image
+# without any network access, as an alternative to BarcodeAPI.org.
+# Every image row is identical, so one row is built as bytes and then
+# repeated for the full height before compression.
+#
+###########################################################################
+
+import struct
+import zlib
+
+# Bar and space widths of every Code128 symbol value, the stop symbol is last
+patterns = [
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312', '132212', '221213',
+    '221312', '231212', '112232', '122132', '122231', '113222', '123122', '123221', '223211', '221132',
+    '221231', '213212', '223112', '312131', '311222', '321122', '321221', '312212', '322112', '322211',
+    '212123', '212321', '232121', '111323', '131123', '131321', '112313', '132113', '132311', '211313',
+    '231113', '231311', '112133', '112331', '132131', '113123', '113321', '133121', '313121', '211331',
+    '231131', '213113', '213311', '213131', '311123', '311321', '331121', '312113', '312311', '332111',
+    '314111', '221411', '431111', '111224', '111422', '121124', '121421', '141122', '141221', '112214',
+    '112412', '122114', '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111',
+    '111242', '121142', '121241', '114212', '124112', '124211', '411212', '421112', '421211', '212141',
+    '214121', '412121', '111143', '111341', '131141', '114113', '114311', '411113', '411311', '113141',
+    '114131', '311141', '411131', '211412', '211214', '211232', '2331112'
+]
+
+# Special symbol values
+codeB = 100
+codeC = 99
+startB = 104
+startC = 105
+stop = 106
+
+# Quiet zone on each side of the bars, in modules
+quietZone = 10
+
+# Translation of bar modules into grayscale pixels
+pixelTable = str.maketrans({'1': '\x00', '0': '\xff'})
+
+# 3x5 pixel digits drawn under the bars of numeric barcodes, one string per pixel row
+digitFont = {
+    '0': ('111', '101', '101', '101', '111'),
+    '1': ('010', '110', '010', '010', '111'),
+    '2': ('111', '001', '111', '100', '111'),
+    '3': ('111', '001', '111', '001', '111'),
+    '4': ('101', '101', '111', '001', '001'),
+    '5': ('111', '100', '111', '001', '111'),
+    '6': ('111', '100', '111', '101', '111'),
+    '7': ('111', '001', '010', '010', '010'),
+    '8': ('111', '101', '111', '101', '111'),
+    '9': ('111', '101', '111', '001', '111')
+}
+
+############################################################################################
+# Encoding functions turn text into Code128 symbol values and bar modules
+############################################################################################
+
+# Function to encode text as Code128 symbol values including start, checksum and stop
+def encode(text):
+
+    if not text:
+        raise ValueError("Cannot encode an empty barcode")
+
+    for character in text:
+        if not 32 <= ord(character) <= 126:
+            raise ValueError(f"Character {character!r} cannot be encoded in Code128 set B")
+
+    values = []
+
+    # Numeric text uses code set C for two digits per symbol, an odd last digit falls back to set B
+    if text.isdigit() and len(text) >= 2:
+        values.append(startC)
+        pairsEnd = len(text) - (len(text) % 2)
+        for index in range(0, pairsEnd, 2):
+            values.append(int(text[index:index + 2]))
+        if pairsEnd < len(text):
+            values.append(codeB)
+            values.append(ord(text[-1]) - 32)
+
+    # Everything else uses code set B
+    else:
+        values.append(startB)
+        for character in text:
+            values.append(ord(character) - 32)
+
+    # Checksum is the start value plus every other value weighted by its position
+    checksum = values[0]
+    for position, value in enumerate(values[1:], start=1):
+        checksum += position * value
+    values.append(checksum % 103)
+    values.append(stop)
+
+    return values
+
+# End of encode
+
+# Function to expand symbol values into a string of modules, '1' for bar and '0' for space
+def modules(values):
+
+    parts = []
+
+    for value in values:
+        isBar = True
+        for width in patterns[value]:
+            parts.append(('1' if isBar else '0') * int(width))
+            isBar = not isBar
+
+    return ''.join(parts)
+
+# End of modules
+
+############################################################################################
+# Writer functions turn bar modules into image files
+############################################################################################
+
+# Function to build a png chunk with its length and crc
+def pngChunk(chunkType, data):
+    return struct.pack('>I', len(data)) + chunkType + data + struct.pack('>I', zlib.crc32(chunkType + data) & 0xffffffff)
+
+# Function to render text as a Code128 png image and return the file content
+def renderPng(text, moduleWidth=2, height=60, showText=True):
+
+    barModules = '0' * quietZone + modules(encode(text)) + '0' * quietZone
+    width = len(barModules) * moduleWidth
+
+    # One grayscale scanline of the bars, black is 0 and white is 255, led by the png filter byte
+    pixelModules = ''.join(module * moduleWidth for module in barModules)
+    barRow = b'\x00' + pixelModules.translate(pixelTable).encode('latin-1')
+
+    rows = [barRow * height]
+
+    # Numeric barcodes get their digits printed underneath, centered under the bars
+    if showText and text.isdigit():
+        scale = max(1, moduleWidth)
+        textWidth = (len(text) * 4 - 1) * scale
+        left = max(0, (width - textWidth) // 2)
+        blankRow = b'\x00' + b'\xff' * width
+        rows.append(blankRow * (2 * scale))
+        for fontRow in range(5):
+            pixels = bytearray(b'\xff' * width)
+            for index, digit in enumerate(text):
+                for column, bit in enumerate(digitFont[digit][fontRow]):
+                    if bit == '1':
+                        start = left + (index * 4 + column) * scale
+                        pixels[start:start + scale] = b'\x00' * min(scale, max(0, width - start))
+            rows.append((b'\x00' + bytes(pixels)) * scale)
+        rows.append(blankRow * (2 * scale))
+
+    imageData = b''.join(rows)
+    totalHeight = len(imageData) // (width + 1)
+
+    header = struct.pack('>IIBBBBB', width, totalHeight, 8, 0, 0, 0, 0)
+
+    return b'\x89PNG\r\n\x1a\n' + pngChunk(b'IHDR', header) + pngChunk(b'IDAT', zlib.compress(imageData, 6)) + pngChunk(b'IEND', b'')
+
+# End of renderPng
+
+# Function to render text as a Code128 svg image and return the file content
+def renderSvg(text, moduleWidth=2, height=60, showText=True):
+
+    barModules = '0' * quietZone + modules(encode(text)) + '0' * quietZone
+    width = len(barModules) * moduleWidth
+    totalHeight = height + (20 if showText else 0)
+
+    # One rectangle per run of bar modules
+    rects = []
+    index = 0
+    while index < len(barModules):
+        if barModules[index] == '1':
+            runEnd = barModules.index('0', index)
+            rects.append(f"<rect x='{index * moduleWidth}' width='{(runEnd - index) * moduleWidth}' height='{height}'/>")
+            index = runEnd
+        else:
+            index += 1
+
+    svg = f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{totalHeight}' viewBox='0 0 {width} {totalHeight}'>"
+    svg += f"<rect width='{width}' height='{totalHeight}' fill='#fff'/><g fill='#000'>{''.join(rects)}</g>"
+
+    if showText:
+        escapedText = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        svg += f"<text x='{width // 2}' y='{height + 15}' text-anchor='middle' font-family='monospace' font-size='14'>{escapedText}</text>"
+
+    svg += "</svg>"
+
+    return svg
+
+# End of renderSvg
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -6,13 +6,28 @@
 #
 ###########################################################################
 
-import asyncio
+import hashlib
 import json
 import os
 import re
-import requests
 import time
 
+import catalog
+import metrics
+import pages
+import tax
+
+# Network and rendering modules are imported inside the barcode functions, so editing items never loads them
+
+# Barcode API endpoint, point this at a local stand-in server for testing
+barcodeApiUrl = 'https://barcodeapi.org/api/code128/'
+
+# Number of barcode downloads allowed in flight at once
+barcodeConcurrency = 8
+
+# Where barcode images come from, 'api' downloads them and 'local' renders them offline
+barcodeSource = 'api'
+
 ############################################################################################
 # Validation functions defined here to facilitate user input validation
 ############################################################################################
@@ -34,6 +49,14 @@ def monetaryValueValidation(inputPrice):
     pattern = r'^[+]?(?:\d{1,3}(,\d{3})*(?:\.\d{0,2})?|\.\d{1,2}|\d{1,3}(,\d{3})*|\d{1,3}(,\d{3})*\.\d{0,2})$'
     return re.match(pattern, inputPrice) is not None
 
+# Whole numbers only, or nothing at all
+def optionalCountValidation(inputString):
+    return inputString == '' or (inputString.isdigit() and int(inputString) > 0)
+
+# Whole numbers including zero, or nothing at all for items that are not stock tracked
+def optionalStockValidation(inputString):
+    return inputString == '' or inputString.isdigit()
+
 # Define a function to validate a folder category name
 def folderCategoryValidation(inputString):
     return inputString in ('otc', 'food')
@@ -63,16 +86,6 @@ def quitMessage():
     print("\n  You entered 'Q' to quit the program. Bye bye!")
     exit()
 
-def sortJson(jsonData):
-
-    # Define sorting function using a dictionary access operation
-    def sortJsonByFullPrice(jsonObject):
-        return jsonObject['fullPrice']
-
-    return sorted(jsonData, key=sortJsonByFullPrice, reverse=True)
-
-# End of sortJson
-
 # Loading bar function
 def printLoadingBar(iteration, total, bar_length=50):
 
@@ -91,53 +104,52 @@ def printLoadingBar(iteration, total, bar_length=50):
 
 # End of printLoadingBar()
 
-# Function used to facilitate calling an async function from dictionary
-def callAsync2():
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(menuOption2())
-    loop.close()
-
 # Function used to facilitate wiping terminal for clean user experience
 def clearTerminalScreen():
     if os.name == 'posix':
-        os.system('clear')
+        print("\033[2J\033[H", end='', flush=True)
     elif os.name == 'nt':
         os.system('cls')
     else:
         print("\n")
 
+# Function to turn a validated monetary input into a number, the same way the catalog reads stored prices
+def parsePrice(inputPrice):
+    return catalog.parsePrice(inputPrice)
+
+# Function to create a new json item from its details, taxable being 'TAX' or 'NO TAX', stock only when it is tracked
+def buildItem(name, skuNum, price, taxable, stock=None, category=None):
+
+    item = {
+        "name": name,
+        "price": price,
+        "skuNum": skuNum,
+        "taxable": taxable,
+        "fullPrice": tax.calculateFullPrice(price, taxable, category)
+    }
+
+    if stock is not None:
+        item['stock'] = stock
+
+    return item
+
 ############################################################################################
 # Operation functions that handle some sort of processing
 ############################################################################################
 
 def deleteItem(inputSku, category):
 
-    # Establish json file path
-    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-    jsonFilePath = os.path.join(parentDirectory, 'itemArchive', category + '.json')
-
-    # Open json file for reading, load data, and close file
+    # Look up the matching item in the category database
     try:
-        jsonFile = open(jsonFilePath, 'r+')
-        jsonData = json.load(jsonFile)
-        jsonFile.close()
+        item = catalog.findItem(category, inputSku)
 
     # Abort entire process
     except:
-        print(f"  Failed to open {jsonFilePath}")
+        print(f"  Failed to open {catalog.catalogPath(category)}")
         return False
 
-    # Index variable to store found item json index
-    indexToRemove = None
-
-    # Iterate json data and get index of matching json item
-    for index, item in enumerate(jsonData):
-        if inputSku in item["skuNum"]:
-            indexToRemove = index
-            break
-
     # If item was not found
-    if not indexToRemove:
+    if item is None:
         print(f"\n  Item was not found in {category} database")
         return False
 
@@ -145,19 +157,12 @@ def deleteItem(inputSku, category):
     else:
 
         # Ask user to confirm deletion
-        print(f"  The item being removed:\n\n{json.dumps(jsonData[indexToRemove], indent=4)}\n")
+        print(f"  The item being removed:\n\n{json.dumps(item, indent=4)}\n")
         confirmDelete = question("  Are you sure you want to delete this item from the database? Y/N ", validation=booleanCharacterValidation)
 
         # User has confirm deletion intention
         if confirmDelete.lower() == 'y':
-
-            jsonData.pop(indexToRemove)
-
-            # Write completed json data to file and close file
-            jsonFile = open(jsonFilePath, 'w')
-            json.dump(jsonData, jsonFile, indent=2)
-            jsonFile.close()
-            return True
+            return writeItemChange(category, lambda: catalog.deleteItem(category, item['skuNum'], expectedItem=item))
 
         # User has denied deletion confirmation, abandon process
         else:
@@ -168,126 +173,343 @@ def deleteItem(inputSku, category):
 
 def updateItem(inputSku, category):
 
-    # Establish json file path
-    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-    jsonFilePath = os.path.join(parentDirectory, 'itemArchive', category + '.json')
-
-    # Open json file for reading, load data, and close file
+    # Look up the matching item in the category database
     try:
-        jsonFile = open(jsonFilePath, 'r+')
-        jsonData = json.load(jsonFile)
-        jsonFile.close()
+        foundItem = catalog.findItem(category, inputSku)
 
     # Abort entire process
     except:
-        print(f"  Failed to open {jsonFilePath}")
+        print(f"  Failed to open {catalog.catalogPath(category)}")
         return False
 
-    indexToUpdate = None
-
-    # Iterate json data and get index of matching json item
-    for index, item in enumerate(jsonData):
-        if inputSku in item["skuNum"]:
-            indexToUpdate = index
-            break
-
     # If item was not found
-    if not indexToUpdate:
+    if foundItem is None:
         print(f"\n  Item was not found in {category} database")
         return False
 
     # Item was found
     else:
 
-        fullPrice = 0.00
+        item = dict(foundItem)
 
         # Show item to user
-        print(f"  The item being updated:\n\n{json.dumps(jsonData[indexToUpdate], indent=4)}\n")
+        print(f"  The item being updated:\n\n{json.dumps(item, indent=4)}\n")
 
         updateNameBool = question("  Update the name of the item? Y/N ", booleanCharacterValidation)
         if updateNameBool.lower() == 'y':
             newName = question("  What is the new name of the item? ", validation=nameLengthValidation)
-            jsonData[indexToUpdate]['name'] = newName
+            item['name'] = newName
 
         updatePriceBool = question("  Update the price of the item? Y/N ", booleanCharacterValidation)
         if updatePriceBool.lower() == 'y':
             newPrice = question("  What is the new price of the item? ", validation=monetaryValueValidation)
-            jsonData[indexToUpdate]['price'] = newPrice
+            item['price'] = parsePrice(newPrice)
 
         updateTaxBool = question("  Do you want to change the item's taxability? Y/N ", validation=booleanCharacterValidation)
         if updateTaxBool.lower() == 'y':
-            if jsonData[indexToUpdate]['taxable'] == 'TAX':
-                jsonData[indexToUpdate]['taxable'] = 'NO TAX'
+            if item['taxable'] == 'TAX':
+                item['taxable'] = 'NO TAX'
             else:
-                jsonData[indexToUpdate]['taxable'] = 'TAX'
+                item['taxable'] = 'TAX'
 
         if updatePriceBool == 'y' or updateTaxBool == 'y':
-            if jsonData[indexToUpdate]['taxable'] == 'TAX':
-                fullPrice = float(jsonData[indexToUpdate]['price']) * 1.08875
-                jsonData[indexToUpdate]['fullPrice'] = round(fullPrice, 2)
+            item['fullPrice'] = tax.calculateFullPrice(item['price'], item['taxable'], category)
+
+        # An empty answer stops tracking the stock of the item
+        updateStockBool = question("  Update the units in stock? Y/N ", validation=booleanCharacterValidation)
+        if updateStockBool.lower() == 'y':
+            newStock = question("  How many units are in stock? Leave empty to stop tracking stock ", validation=optionalStockValidation)
+            if newStock == '':
+                item.pop('stock', None)
             else:
-                jsonData[indexToUpdate]['fullPrice'] = jsonData[indexToUpdate]['price']
+                item['stock'] = int(newStock)
 
-        if updateNameBool.lower() == updatePriceBool.lower() == updateTaxBool.lower() == 'n':
+        if updateNameBool.lower() == updatePriceBool.lower() == updateTaxBool.lower() == updateStockBool.lower() == 'n':
             print(f"\n  No changes were made to the item")
             return False
 
-        # Write completed json data to file and close file
-        jsonFile = open(jsonFilePath, 'w')
-        json.dump(jsonData, jsonFile, indent=2)
-        jsonFile.close()
-        return True
+        # Write the updated item back to the category database
+        return writeItemChange(category, lambda: catalog.updateItem(category, foundItem['skuNum'], item, expectedItem=foundItem))
 
 # End of updateItem
 
-# Define function to fetch barcode images for all items in particular json file and facilitate progress bar
-async def barcodeSync(itemSku, category, index, total):
-
-    # Define the endpoint url we will use
-    apiUrl = 'https://barcodeapi.org/api/code128/'
+# Function to run a single item change, returns False when the item was changed or removed by another terminal first, or its sku is taken
+def writeItemChange(category, change):
 
     try:
+        changed = change()
+    except catalog.CatalogConflictError as e:
+        print(f"\n  {e}")
+        return False
 
-        # Make an API call
-        response = requests.get(apiUrl+itemSku, timeout=1)
+    if not changed:
+        print(f"\n  The item is no longer in the {category} database, another terminal removed it")
 
-        if response.status_code == 200:
+    return changed
 
-            # Define the parent directory to access the images folder
-            parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# End of writeItemChange
 
-            # Check if the images folder exists or create it otherwise
-            imagesDirectory = os.path.join(parentDirectory, 'images')
-            os.makedirs(imagesDirectory, exist_ok=True)
+# Function to write a category database back in price order, returns the json data
+def sortDatabase(category):
 
-            # Check if the specific category folder exists or create it otherwise
-            categoryDirectory = os.path.join(imagesDirectory, category)
-            os.makedirs(categoryDirectory, exist_ok=True)
+    # Start over when another terminal changed the database in the meantime
+    while True:
 
-            # Define the local path to save the image to
-            filePath = os.path.join(categoryDirectory, itemSku+".png")
+        # Get data from the category database, the catalog loads it in price order
+        jsonData, version = catalog.loadJsonDataVersion(category)
 
-            # Save image to local folder
-            file = open(filePath, 'wb')
-            file.write(response.content)
-            file.close()
+        # Writing it back folds in the journal and puts a file saved before the price order was kept in order
+        try:
+            catalog.saveJsonData(category, jsonData, expectedVersion=version)
+            return jsonData
+        except catalog.CatalogConflictError:
+            print(f"  The {category} database changed while sorting, trying again")
 
-        else:
-            print(f"  Failed to retrieve the image. Status code: {response.status_code}")
+# End of sortDatabase
+
+# Function to establish the barcode image folder of a category
+def imageDirectory(category):
+    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+    return os.path.join(parentDirectory, 'images', category)
+
+# Function to create a pooled keep-alive session sized for the number of concurrent downloads
+def createBarcodeSession(concurrency=barcodeConcurrency):
+    import requests
+    import requests.adapters
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+# Define function to fetch the barcode image for one item, retrying with backoff, and report the result
+@metrics.timed('barcodeSync', lambda result, *args, **kwargs: {'skuNum': result['skuNum'], 'ok': result['ok'], 'attempts': result['attempts']})
+def barcodeSync(itemSku, category, session, apiUrl=barcodeApiUrl, retries=3, backoff=0.5, timeout=5):
+    import requests
+
+    # Define the local path to save the image to
+    filePath = os.path.join(imageDirectory(category), itemSku+".png")
+
+    result = {'skuNum': itemSku, 'ok': False, 'attempts': 0, 'error': None}
+
+    for attempt in range(retries + 1):
+
+        # Wait a little longer before each retry
+        if attempt > 0:
+            time.sleep(backoff * (2 ** (attempt - 1)))
+
+        result['attempts'] = attempt + 1
+
+        try:
+
+            # Make an API call
+            response = session.get(apiUrl+itemSku, timeout=timeout)
+
+            if response.status_code == 200:
+
+                # Save image to local folder
+                file = open(filePath, 'wb')
+                file.write(response.content)
+                file.close()
+
+                # Record what was written for the image manifest
+                result['ok'] = True
+                result['error'] = None
+                result['sha256'] = hashlib.sha256(response.content).hexdigest()
+                result['size'] = len(response.content)
+                result['fetched'] = time.time()
+                return result
 
-    except Excepton as e:
-        print(f"  API request error: {e}")
+            result['error'] = f"Status code: {response.status_code}"
 
-    printLoadingBar(index + 1, total)
+            # Client errors will not go away on retry, other than rate limiting
+            if response.status_code < 500 and response.status_code != 429:
+                return result
+
+        except requests.RequestException as e:
+            result['error'] = f"API request error: {e}"
+
+        except OSError as e:
+            result['error'] = f"Failed to write {filePath}: {e}"
+            return result
+
+    return result
 
 # End of barcodeSync()
 
+# Define function to render the barcode image for one item offline and report the result like barcodeSync
+@metrics.timed('barcodeRender', lambda result, *args, **kwargs: {'skuNum': result['skuNum'], 'ok': result['ok']})
+def renderBarcode(itemSku, category):
+    import code128
+
+    # Define the local path to save the image to
+    filePath = os.path.join(imageDirectory(category), itemSku+".png")
+
+    result = {'skuNum': itemSku, 'ok': False, 'attempts': 1, 'error': None}
+
+    try:
+        imageContent = code128.renderPng(itemSku)
+
+        # Save image to local folder
+        file = open(filePath, 'wb')
+        file.write(imageContent)
+        file.close()
+
+    except ValueError as e:
+        result['error'] = f"Cannot render barcode: {e}"
+        return result
+
+    except OSError as e:
+        result['error'] = f"Failed to write {filePath}: {e}"
+        return result
+
+    # Record what was written for the image manifest
+    result['ok'] = True
+    result['sha256'] = hashlib.sha256(imageContent).hexdigest()
+    result['size'] = len(imageContent)
+    result['fetched'] = time.time()
+    return result
+
+# End of renderBarcode
+
+# Function to load the image manifest of a category, mapping each sku to the hash, size and fetch time of its image
+def loadImageManifest(category):
+
+    manifestPath = os.path.join(imageDirectory(category), 'manifest.json')
+
+    # A missing or unreadable manifest simply means every image gets checked again
+    try:
+        manifestFile = open(manifestPath, 'r')
+        manifest = json.load(manifestFile)
+        manifestFile.close()
+        return manifest
+    except (OSError, ValueError):
+        return {}
+
+# End of loadImageManifest
+
+# Function to save the image manifest of a category
+def saveImageManifest(category, manifest):
+
+    manifestPath = os.path.join(imageDirectory(category), 'manifest.json')
+
+    catalog.atomicWrite(manifestPath, json.dumps(manifest))
+
+# End of saveImageManifest
+
+# Function to hash an image file on disk
+def imageHash(filePath):
+    try:
+        file = open(filePath, 'rb')
+        digest = hashlib.sha256(file.read()).hexdigest()
+        file.close()
+        return digest
+    except OSError:
+        return None
+
+# End of imageHash
+
+# Function to work out which barcode images need fetching and which images belong to deleted items
+def planBarcodeSync(jsonData, category, manifest, verify=False):
+
+    categoryDirectory = imageDirectory(category)
+
+    # One directory listing gives the size of every image on disk without a stat call per sku
+    imageSizes = {}
+    for entry in os.scandir(categoryDirectory):
+        if entry.name.endswith('.png') and entry.is_file():
+            imageSizes[entry.name[:-4]] = entry.stat().st_size
+
+    itemsToFetch = []
+    skuSet = set()
+
+    for item in jsonData:
+        skuNum = item['skuNum']
+        skuSet.add(skuNum)
+        record = manifest.get(skuNum)
+
+        # A barcode only depends on its sku, so a recorded image of the right size is still valid
+        if record is not None and imageSizes.get(skuNum) == record['size'] and record['size'] > 0:
+            if not verify or imageHash(os.path.join(categoryDirectory, skuNum + '.png')) == record['sha256']:
+                continue
+
+        itemsToFetch.append(item)
+
+    # Images on disk or in the manifest that no longer match any item
+    orphanSkus = sorted((set(imageSizes) | set(manifest)) - skuSet)
+
+    return itemsToFetch, orphanSkus
+
+# End of planBarcodeSync
+
+# Define function to fetch barcode images for all items in particular json file and facilitate progress bar
+@metrics.timed('syncBarcodes', lambda result, jsonData, category, *args, **kwargs: {'category': category, 'fetched': len(result['results']), 'skipped': result['skipped'], 'pruned': result['pruned']})
+def syncBarcodes(jsonData, category, concurrency=barcodeConcurrency, apiUrl=barcodeApiUrl, incremental=True, verify=False, source=None):
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # Check if the images folder and the specific category folder exist or create them otherwise
+    categoryDirectory = imageDirectory(category)
+    os.makedirs(categoryDirectory, exist_ok=True)
+
+    # Incremental mode only fetches new or broken images and prunes images of deleted items
+    if incremental:
+        manifest = loadImageManifest(category)
+        itemsToFetch, orphanSkus = planBarcodeSync(jsonData, category, manifest, verify)
+    else:
+        manifest = {}
+        itemsToFetch, orphanSkus = jsonData, []
+
+    for skuNum in orphanSkus:
+        manifest.pop(skuNum, None)
+        try:
+            os.remove(os.path.join(categoryDirectory, skuNum + '.png'))
+        except FileNotFoundError:
+            pass
+
+    results = []
+    total = len(itemsToFetch)
+
+    # Offline rendering is cpu bound and fast, so it runs in this thread
+    if total > 0 and (source or barcodeSource) == 'local':
+
+        for index, item in enumerate(itemsToFetch):
+            result = renderBarcode(item['skuNum'], category)
+            results.append(result)
+            printLoadingBar(index + 1, total)
+
+            if result['ok']:
+                manifest[result['skuNum']] = {'sha256': result['sha256'], 'size': result['size'], 'fetched': result['fetched']}
+
+    elif total > 0:
+
+        session = createBarcodeSession(concurrency)
+
+        # Run the downloads on a thread pool, at most concurrency requests in flight at once
+        with session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(barcodeSync, item['skuNum'], category, session, apiUrl) for item in itemsToFetch]
+            for index, future in enumerate(as_completed(futures)):
+                result = future.result()
+                results.append(result)
+                printLoadingBar(index + 1, total)
+
+                if result['ok']:
+                    manifest[result['skuNum']] = {'sha256': result['sha256'], 'size': result['size'], 'fetched': result['fetched']}
+
+    # Only touch the manifest file when something changed
+    if total > 0 or orphanSkus or not incremental:
+        saveImageManifest(category, manifest)
+
+    return {'results': results, 'skipped': len(jsonData) - total, 'pruned': len(orphanSkus)}
+
+# End of syncBarcodes
+
 ##############################################################################################
 # Menu functions that handle some sort of processing and may make use of operation functions
 ##############################################################################################
 
-# Define menuOption2() to run both sort() and barcodeSync()
-async def menuOption2():
+# Define menuOption2() to run both sort() and syncBarcodes()
+def menuOption2():
 
     # Request category from user
     category = question("\n  Would you like to sync the food database? Y/N ", booleanCharacterValidation)
@@ -299,30 +521,29 @@ async def menuOption2():
     else:
         category = 'otc'
 
-    # Get data from json file
-    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-    jsonFilePath = os.path.join(parentDirectory, 'itemArchive', category+'.json')
+    # Write the database back in price order
+    jsonData = sortDatabase(category)
 
-    # Open json file for reading, save data
-    jsonFile = open(jsonFilePath, 'r+')
-    jsonData = json.load(jsonFile)
+    # Ask whether to start the barcode images over from zero
+    fullRefresh = question("  Re-download every barcode image? Y/N ", booleanCharacterValidation)
 
-    # Call sort function on otcData
-    jsonData = sortJson(jsonData)
+    # Ask whether to render barcode images offline instead of calling the barcode API
+    renderLocally = question("  Render barcode images offline instead of downloading them? Y/N ", booleanCharacterValidation)
+    print()
 
-    # Set pointer at beginning, write the sorted data back to the file, close file
-    jsonFile.seek(0)
-    json.dump(jsonData, jsonFile, indent=2)
-    jsonFile.close()
+    if renderLocally.lower() == 'y':
+        source = 'local'
+    else:
+        source = 'api'
 
-    # Create a sync tasks array
-    tasks = []
-    for index, item in enumerate(jsonData):
-        task = barcodeSync(item['skuNum'], category, index, len(jsonData))
-        tasks.append(task)
+    # Fetch new barcode images and report the ones that failed
+    syncReport = syncBarcodes(jsonData, category, incremental=(fullRefresh.lower() != 'y'), source=source)
+    results = syncReport['results']
+    failedResults = [result for result in results if not result['ok']]
 
-    # Launch async tasks cluster
-    await asyncio.gather(*tasks)
+    print(f"\n  {len(results) - len(failedResults)} of {len(results)} barcode images synced, {syncReport['skipped']} already up to date, {syncReport['pruned']} removed")
+    for result in failedResults:
+        print(f"  Failed {result['skuNum']} after {result['attempts']} attempt(s): {result['error']}")
 
     # Exit prompt
     confirmPrompt = question("\n  Done syncing database and barcodes\n  Press enter to continue...")
@@ -341,56 +562,27 @@ def menuOption3():
     else:
         category = "otc"
 
-    # Establish json file path
-    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-    jsonFilePath = os.path.join(parentDirectory, 'itemArchive', category + '.json')
+    # Long lists can be split into pages that are quicker to open and print
+    itemsPerPage = question("  How many items per page? Press enter for a single page ", validation=optionalCountValidation)
 
-    # Open json file for writing and load data
-    jsonFile = open(jsonFilePath, 'r+')
-    jsonData = json.load(jsonFile)
-    jsonFile.close()
-
-    html = ""
-
-    if category == 'food':
-        html = f"<html><head><title>{category} Master List</title></head><body><h1 style=font-size:50px>Food Master List</h1>"
+    if itemsPerPage == '':
+        itemsPerPage = None
     else:
-        html = f"<html><head><title>{category} Master List</title></head><body><h1 style=font-size:50px>OTC Master List</h1>"
-
-    # Loop through items and add items to html file
-    for index, item in enumerate(jsonData):
-
-        # Insert html display flex wrap every n items
-        if index % 3 == 0:
-            html += f"<div style='display: flex; flex-wrap: wrap;'>";
+        itemsPerPage = int(itemsPerPage)
 
-        # Insert data and png for each item, flex basis determines seperation space
-        if item['taxable'] == 'TAX':
-            # html += '<div style="flex-basis: 30%; padding: 20px;"><h2>${item.name}</h2><h3>Price: $${item.price} * => ( $${item.fullPrice} )</h3>';
-            html += f"<div style='flex-basis: 30%; padding: 20px;'><h2>{item['name']}</h2><h3>Price: ${item['price']} * => ( ${item['fullPrice']} )</h3>";
-        else:
-            # html += '<div style="flex-basis: 30%; padding: 20px;"><h2>${item.name}</h2><h3>Price: $${item.fullPrice}</h3>';
-            html += f"<div style='flex-basis: 30%; padding: 20px;'><h2>{item['name']}</h2><h3>Price: ${item['fullPrice']}</h3>";
-
-        # Replace backslashes with forward slashes in the parentDirectory variable (may be required for windows)
-        tempDirectory = parentDirectory.replace('\\', '/')
-        html += f"<img src='{tempDirectory}/images/{category}/{item['skuNum']}.png'></div>"
+    # Embedded barcodes make the files portable to any computer, such as the print station
+    embedImages = question("  Embed the barcode images so the file works on any computer? Y/N ", validation=booleanCharacterValidation)
 
-        # Create seperation every three items
-        if ((index + 1) % 3 == 0 or index == len(jsonData) - 1):
-            html += f"</div>";        
-
-    # End of for loop
+    if embedImages.lower() == 'y':
+        mode = 'inline'
+    else:
+        mode = None
 
-    # Close off the html file
-    html += f"<h3>Total Items: {len(jsonData)}</h3>"
-    html += f"</body></html>";
+    # Load data and stream the html files to the parent directory
+    jsonData = catalog.loadJsonData(category)
+    writtenPaths = pages.writeMasterList(category, jsonData, itemsPerPage, mode=mode)
 
-    # Write html file to parent directory
-    htmlFilePath = os.path.join(parentDirectory, 'masterList.html')
-    htmlFile = open(htmlFilePath, 'w')
-    htmlFile.write(html)
-    htmlFile.close()
+    print(f"\n  Wrote {len(writtenPaths)} file(s), open {writtenPaths[0]}")
 
     # Exit prompt
     confirmPrompt = question("\n  File written successfully\n  Press enter to continue...")
@@ -404,8 +596,9 @@ def menuOption4():
     # Request data from user to inform item creation
     name = question("  What is the name of the item? ", validation=nameLengthValidation)
     skuNum = question("  What is the item's 11 or 12 digit sku number? ", validation=skuLengthValidation)
-    price = float(question("  What is the price of the item? ", validation=monetaryValueValidation))
+    price = parsePrice(question("  What is the price of the item? ", validation=monetaryValueValidation))
     taxable = question("  Is the item taxable? Y/N ", validation=booleanCharacterValidation)
+    stock = question("  How many units are in stock? Leave empty to not track stock ", validation=optionalStockValidation)
     category = question("  Is the item a food product? Y/N  ", validation=booleanCharacterValidation)
 
     # Determine if folder category should be food or otc
@@ -414,41 +607,20 @@ def menuOption4():
     else:
         category = 'otc'
 
-    # Calculate the fullPrice and change taxable variable to a string value
+    # Change taxable variable to a string value
     if taxable.lower() == 'y':
         taxable = 'TAX'
-        fullPrice = price * 1.08875
     else:
         taxable = 'NO TAX'
-        fullPrice = price
 
-    # Create new json item
-    newItem = {
-        "name": name,
-        "price": price,
-        "skuNum": skuNum,
-        "taxable": taxable,
-        "fullPrice": round(fullPrice, 2)
-    }
-
-    # Establish json file path
-    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-    jsonFilePath = os.path.join(parentDirectory, 'itemArchive', category + '.json')
-
-    # Open json file for writing and load data
-    jsonFile = open(jsonFilePath, 'r+')
-    jsonData = json.load(jsonFile)
-
-    # Append new json item to json file
-    jsonData.append(newItem)
+    # Create new json item with its fullPrice
+    newItem = buildItem(name, skuNum, price, taxable, int(stock) if stock else None, category)
 
-    # Write completed json data to file and close file
-    jsonFile.seek(0)
-    json.dump(jsonData, jsonFile, indent=2)
-    jsonFile.close()
-
-    # Exit prompt
-    confirmPrompt = question(f"\n  New JSON item was added to the {category} database\n  Press enter to continue...")
+    # Append new json item to the category database, unless its sku is already there
+    if writeItemChange(category, lambda: catalog.addItem(category, newItem)):
+        confirmPrompt = question(f"\n  New JSON item was added to the {category} database\n  Press enter to continue...")
+    else:
+        confirmPrompt = question(f"\n  No item was added to the {category} database\n  Press enter to continue...")
     clearTerminalScreen()
 
 # End of menuOption4
@@ -456,14 +628,11 @@ def menuOption4():
 # Define menuOption5() to update item from json file
 def menuOption5():
 
-    # List of known json database categories
-    categoryList = ['food', 'otc']
-
     # Ask user for item sku number
     inputSku = question("  Enter the first 10 or more digits of the item sku number: ", validation=skuLengthValidation)
 
     # Check each category for matching item, delete
-    for category in categoryList:
+    for category in catalog.categoryList:
         try:
             if updateItem(inputSku, category):
                 print(f"  Item {inputSku} was updated successfully in {category} folder")
@@ -482,14 +651,11 @@ def menuOption5():
 # Define menuOption6() to delete item from json file, starting with food json then otc json files
 def menuOption6():
 
-    # List of known json database categories
-    categoryList = ['food', 'otc']
-
     # Ask user for item sku number
     inputSku = question("  Enter the first 10 or more digits of the item sku number: ", validation=skuLengthValidation)
 
     # Check each category for matching item, delete
-    for category in categoryList:
+    for category in catalog.categoryList:
         try:
             if deleteItem(inputSku, category):
                 print(f"  Item {inputSku} was deleted successfully in {category} folder")
@@ -514,7 +680,7 @@ def menuPrompt():
     # Create a dictionary of the available functions based on user input
     menuOptionDictionary = {
         '1': editMenuPrompt,
-        '2': callAsync2,
+        '2': menuOption2,
         '3': menuOption3,
         'q': quitMessage
     }
@@ -596,7 +762,18 @@ def editMenuPrompt():
 # Main menu launcher starts the program
 ##################################################################
 
-menuPrompt()
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the food and otc item databases")
+    metrics.addArguments(parser)
+    metrics.configure(parser.parse_args(argv))
+
+    with metrics.run('manage'):
+        menuPrompt()
+
+if __name__ == '__main__':
+    main()
 
 ####################################################################################
 #
@@ -0,0 +1,159 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Run metrics and profiling
+#
+# Times the stages of a run, such as loading and saving a database,
+# every barcode download, each randomizer run and html rendering, and
+# appends one JSON line per stage to a metrics log. A last line per run
+# sums up the time spent in each stage. Nothing is measured unless a log
+# is given, so the timers cost a single check when switched off.
+#
+# Switch it on with --metrics <file> on any program, or the OTC_METRICS_LOG
+# environment variable. --profile <file>, or OTC_PROFILE, also captures a
+# cProfile of the whole run, to be read with 'python -m pstats <file>'.
+#
+###########################################################################
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+# Jsonl file the stage timings are appended to, None switches the timers off
+metricsLogPath = os.environ.get('OTC_METRICS_LOG') or None
+
+# File the cProfile statistics of a run are written to, None skips profiling
+profilePath = os.environ.get('OTC_PROFILE') or None
+
+# Identifier shared by every line of one run, and the time spent in each stage so far
+runId = uuid.uuid4().hex[:12]
+stageTotals = {}
+
+# Barcode downloads finish on several threads at once
+metricsLock = threading.Lock()
+
+############################################################################################
+# Setup functions that switch metrics on from the command line
+############################################################################################
+
+# Function to add the --metrics and --profile options to a program's argument parser
+def addArguments(parser):
+    parser.add_argument('--metrics', metavar='FILE', default=None, help="append stage timings to this jsonl file")
+    parser.add_argument('--profile', metavar='FILE', default=None, help="write cProfile statistics of the run to this file")
+
+# Function to switch metrics on with the parsed --metrics and --profile options
+def configure(args):
+    global metricsLogPath, profilePath
+
+    if args.metrics:
+        metricsLogPath = args.metrics
+    if args.profile:
+        profilePath = args.profile
+
+# End of configure
+
+############################################################################################
+# Timer functions that measure one stage each
+############################################################################################
+
+# Function to append one record to the metrics log
+def record(entry):
+
+    line = json.dumps(dict({'run': runId, 'time': round(time.time(), 3)}, **entry)) + "\n"
+
+    with metricsLock:
+        with open(metricsLogPath, 'a') as logFile:
+            logFile.write(line)
+
+# End of record
+
+# Context manager timing the code inside it, the yielded dict takes extra details for the log line
+@contextlib.contextmanager
+def timer(stage, **details):
+
+    if metricsLogPath is None:
+        yield details
+        return
+
+    start = time.perf_counter()
+    try:
+        yield details
+    finally:
+        milliseconds = (time.perf_counter() - start) * 1000
+
+        with metricsLock:
+            totals = stageTotals.setdefault(stage, {'count': 0, 'milliseconds': 0.0})
+            totals['count'] += 1
+            totals['milliseconds'] += milliseconds
+
+        record(dict({'stage': stage, 'milliseconds': round(milliseconds, 3)}, **details))
+
+# End of timer
+
+# Decorator timing every call of a function, detailFunction turns its return value and arguments into extra details
+def timed(stage, detailFunction=None):
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+
+            if metricsLogPath is None:
+                return function(*args, **kwargs)
+
+            with timer(stage) as details:
+                result = function(*args, **kwargs)
+                if detailFunction is not None:
+                    details.update(detailFunction(result, *args, **kwargs))
+                return result
+
+        return wrapper
+
+    return decorator
+
+# End of timed
+
+# Context manager around a whole program run, profiles it and logs the total time of each stage at the end
+@contextlib.contextmanager
+def run(program):
+
+    profiler = None
+    if profilePath is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profilePath)
+
+        if metricsLogPath is not None:
+            stages = {stage: {'count': totals['count'], 'milliseconds': round(totals['milliseconds'], 3)} for stage, totals in stageTotals.items()}
+            record({'stage': 'run', 'program': program, 'milliseconds': round((time.perf_counter() - start) * 1000, 3), 'stages': stages})
+
+# End of run
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -0,0 +1,312 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Html page writers
+#
+# The master list and the transaction sheet share one stylesheet, emitted
+# once in the page head, and item templates compiled once per page with
+# the image folder already filled in, so each item only costs one format
+# call and a few short class names.
+#
+# The master list is produced by generators that yield small chunks of
+# html which go straight into a buffered file, so memory stays flat no
+# matter how large the database is. Long lists can be split into pages,
+# written as masterList-<category>-<n>.html, with masterList.html turned
+# into an index linking to every page.
+#
+# Barcode images are linked as images/<category>/<sku>.png by default,
+# relative to the project folder. Pages written anywhere else link them
+# relative to their own folder, or by absolute file uri when the page has
+# no file of its own, see imageDirectoryFor.
+# The 'inline' image mode embeds each png as a data uri and the 'svg'
+# mode draws each barcode as inline svg with the offline renderer, so the
+# page is a single portable file that opens with one read. Choose the mode
+# with the OTC_HTML_IMAGES environment variable or the imageMode argument.
+#
+###########################################################################
+
+import base64
+import os
+import pathlib
+
+import metrics
+
+# Number of items shown side by side on each master list row
+masterListColumns = 3
+
+# Size of the write buffer used for html files
+writeBufferSize = 1 << 16
+
+# How barcode images appear in pages, 'link', 'inline' or 'svg'
+imageMode = os.environ.get('OTC_HTML_IMAGES', 'link')
+
+# Stylesheet shared by every generated page, r is a row, m a master list item, t a transaction item
+pageStyles = (
+    "h1{font-size:50px}"
+    ".r{display:flex;flex-wrap:wrap}"
+    ".s{background-color:#ededed}"
+    ".m{flex-basis:30%;padding:20px}"
+    ".t{flex-basis:45%;padding:5px}"
+    ".big{font-size:35px}"
+)
+
+############################################################################################
+# Template functions that compile the per item html once per page
+############################################################################################
+
+# Function to get the barcode image folder of a category as a page written to pagePath links it
+def imageDirectoryFor(category, pagePath=None):
+
+    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+    categoryDirectory = os.path.join(parentDirectory, 'images', category)
+
+    # A page on another windows drive has no relative path to the images, and a page on stdout has no folder at all
+    if pagePath is not None:
+        try:
+            return os.path.relpath(categoryDirectory, os.path.dirname(os.path.abspath(pagePath))).replace(os.sep, '/')
+        except ValueError:
+            pass
+
+    return pathlib.Path(categoryDirectory).as_uri()
+
+# End of imageDirectoryFor
+
+# Function to build the head of a page with the shared stylesheet
+def pageHead(title):
+    return f"<html><head><title>{title}</title><style>{pageStyles}</style></head><body>"
+
+# Function to compile the item templates of a page, returns the format functions for taxed and untaxed items and the image function
+def compileItemTemplates(itemClass, category, imageDirectory, mode=None):
+
+    mode = mode or imageMode
+
+    # Linked images are baked into the template, braces in the folder name must survive the format call
+    if mode == 'link':
+        imageDirectory = imageDirectory.replace('{', '{{').replace('}', '}}')
+        image = f"<img src='{imageDirectory}/{{skuNum}}.png'></div>"
+        imageFunction = None
+
+    # Embedded images are filled in per item
+    else:
+        image = "{image}</div>"
+        imageFunction = embeddedImageFunction(category, mode)
+
+    taxTemplate = f"<div class={itemClass}><h2>{{name}}</h2><h3>Price: ${{price}} * => ( ${{fullPrice}} )</h3>" + image
+    noTaxTemplate = f"<div class={itemClass}><h2>{{name}}</h2><h3>Price: ${{fullPrice}}</h3>" + image
+
+    return taxTemplate.format_map, noTaxTemplate.format_map, imageFunction
+
+# End of compileItemTemplates
+
+# Function to render one item with the compiled templates
+def renderItem(item, templates):
+
+    if templates[2] is not None:
+        item = dict(item, image=templates[2](item['skuNum']))
+
+    if item['taxable'] == 'TAX':
+        return templates[0](item)
+    return templates[1](item)
+
+# End of renderItem
+
+# Function to build a function returning the embedded image html of a sku, each sku is only encoded once per page
+def embeddedImageFunction(category, mode):
+    import code128
+
+    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+    categoryDirectory = os.path.join(parentDirectory, 'images', category)
+    cache = {}
+
+    def imageHtml(skuNum):
+
+        if skuNum in cache:
+            return cache[skuNum]
+
+        html = None
+
+        # Png files already on disk become data uris
+        if mode == 'inline':
+            try:
+                imageFile = open(os.path.join(categoryDirectory, skuNum + '.png'), 'rb')
+                html = "<img src='data:image/png;base64," + base64.b64encode(imageFile.read()).decode('ascii') + "'>"
+                imageFile.close()
+            except OSError:
+                html = None
+
+        # Svg mode, or an inline image that was never downloaded, is drawn offline
+        if html is None:
+            try:
+                html = code128.renderSvg(skuNum)
+            except ValueError:
+                html = ''
+
+        cache[skuNum] = html
+        return html
+
+    return imageHtml
+
+# End of embeddedImageFunction
+
+############################################################################################
+# Chunk generators that yield the html of a master list page piece by piece
+############################################################################################
+
+# Function to yield the html of one master list page in chunks of one row
+def masterListChunks(category, items, totalItems, pageNumber=1, pageCount=1, imageDirectory=None, mode=None):
+
+    # Image paths are relative to the parent directory the pages are written to
+    if imageDirectory is None:
+        imageDirectory = f"images/{category}"
+
+    templates = compileItemTemplates('m', category, imageDirectory, mode)
+
+    if category == 'food':
+        title = "Food Master List"
+    else:
+        title = "OTC Master List"
+
+    if pageCount > 1:
+        title += f" - Page {pageNumber} of {pageCount}"
+
+    yield pageHead(title) + f"<h1>{title}</h1>"
+
+    # One flex row per group of columns, yielded as soon as it is complete
+    row = []
+    for item in items:
+        row.append(renderItem(item, templates))
+        if len(row) == masterListColumns:
+            yield "<div class=r>" + ''.join(row) + "</div>"
+            row = []
+
+    if row:
+        yield "<div class=r>" + ''.join(row) + "</div>"
+
+    # Page links when the list is split over several files
+    if pageCount > 1:
+        yield masterListNavigationHtml(category, pageNumber, pageCount)
+
+    yield f"<h3>Total Items: {totalItems}</h3></body></html>"
+
+# End of masterListChunks
+
+# Function to build the previous, index and next links at the bottom of a master list page
+def masterListNavigationHtml(category, pageNumber, pageCount):
+
+    links = []
+
+    if pageNumber > 1:
+        links.append(f"<a href='{masterListPageName(category, pageNumber - 1)}'>Previous</a>")
+    links.append("<a href='masterList.html'>Index</a>")
+    if pageNumber < pageCount:
+        links.append(f"<a href='{masterListPageName(category, pageNumber + 1)}'>Next</a>")
+
+    return "<h3>" + " | ".join(links) + "</h3>"
+
+# End of masterListNavigationHtml
+
+# Function to yield the html of the index page linking to every master list page
+def masterListIndexChunks(category, pageCount, itemsPerPage, totalItems):
+
+    if category == 'food':
+        title = "Food Master List"
+    else:
+        title = "OTC Master List"
+
+    yield pageHead(title) + f"<h1>{title}</h1><ul>"
+
+    for pageNumber in range(1, pageCount + 1):
+        firstItem = (pageNumber - 1) * itemsPerPage + 1
+        lastItem = min(pageNumber * itemsPerPage, totalItems)
+        yield f"<li><h2><a href='{masterListPageName(category, pageNumber)}'>Page {pageNumber}</a> (items {firstItem} to {lastItem})</h2></li>"
+
+    yield f"</ul><h3>Total Items: {totalItems}</h3></body></html>"
+
+# End of masterListIndexChunks
+
+# Function to yield the html body of one transaction sheet, two items per row with every other row shaded
+def transactionChunks(category, total, selectedItems, remainder, imageDirectory=None, mode=None):
+
+    # Image paths are relative to the parent directory the sheet is written to
+    if imageDirectory is None:
+        imageDirectory = f"images/{category}"
+
+    templates = compileItemTemplates('t', category, imageDirectory, mode)
+
+    yield f"<h1>{(category[0].upper()+category[1:])} Items List</h1><h2 class=big>Target total: {int(total)}</h2>"
+
+    for start in range(0, len(selectedItems), 2):
+        if start % 4 == 2:
+            rowOpen = "<div class='r s'>"
+        else:
+            rowOpen = "<div class=r>"
+        yield rowOpen + ''.join(renderItem(item, templates) for item in selectedItems[start:start + 2]) + "</div>"
+
+    yield f"<h2 class=big>Final total: ~${round(total - remainder)}</h2>"
+
+# End of transactionChunks
+
+############################################################################################
+# Writer functions that stream chunks into files
+############################################################################################
+
+# Function to name the file of one master list page
+def masterListPageName(category, pageNumber):
+    return f"masterList-{category}-{pageNumber}.html"
+
+# Function to stream chunks into a file through a large write buffer
+def writeChunks(filePath, chunks):
+    with open(filePath, 'w', buffering=writeBufferSize) as htmlFile:
+        htmlFile.writelines(chunks)
+
+# Function to write the master list of a category, split into pages when itemsPerPage is given
+@metrics.timed('masterList', lambda result, category, jsonData, *args, **kwargs: {'category': category, 'items': len(jsonData), 'files': len(result)})
+def writeMasterList(category, jsonData, itemsPerPage=None, directory=None, mode=None):
+
+    # Write html files to parent directory unless told otherwise
+    if directory is None:
+        directory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+    totalItems = len(jsonData)
+    indexPath = os.path.join(directory, 'masterList.html')
+
+    # Every page is written to the same folder, so they all link the images the same way
+    imageDirectory = imageDirectoryFor(category, indexPath)
+
+    # A single page holds everything
+    if not itemsPerPage or totalItems <= itemsPerPage:
+        writeChunks(indexPath, masterListChunks(category, jsonData, totalItems, imageDirectory=imageDirectory, mode=mode))
+        return [indexPath]
+
+    pageCount = (totalItems + itemsPerPage - 1) // itemsPerPage
+    writtenPaths = [indexPath]
+
+    # Each page only walks its own slice of items
+    for pageNumber in range(1, pageCount + 1):
+        start = (pageNumber - 1) * itemsPerPage
+        pageItems = (jsonData[index] for index in range(start, min(start + itemsPerPage, totalItems)))
+        pagePath = os.path.join(directory, masterListPageName(category, pageNumber))
+        writeChunks(pagePath, masterListChunks(category, pageItems, totalItems, pageNumber, pageCount, imageDirectory, mode))
+        writtenPaths.append(pagePath)
+
+    writeChunks(indexPath, masterListIndexChunks(category, pageCount, itemsPerPage, totalItems))
+
+    return writtenPaths
+
+# End of writeMasterList
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -6,11 +6,20 @@
 #
 ###########################################################################
 
-import json
+import bisect
 import os
 import random
 import re
 import traceback
+from array import array
+from itertools import accumulate
+
+import metrics
+import pages
+from catalog import itemFields, loadJsonData, optionalItemFields
+
+# Growth of the price weight from one alias table band to the next, at least 1 / aliasBandGrowth of the draws are kept
+aliasBandGrowth = 1.25
 
 ############################################################################################
 # Validation functions defined here to facilitate user input validation
@@ -53,13 +62,14 @@ def quitMessage():
 # Function used to facilitate wiping terminal for clean user experience
 def clearTerminalScreen():
     if os.name == 'posix':
-        os.system('clear')
+        print("\033[2J\033[H", end='', flush=True)
     elif os.name == 'nt':
         os.system('cls')
     else:
         print("\n")
 
 # Function used to sort json data in ascending order of fullPrice
+@metrics.timed('sortJson', lambda result, jsonData: {'items': len(jsonData)})
 def sortJson(jsonData):
 
     # Define sorting function using a dictionary access operation
@@ -70,113 +80,483 @@ def sortJson(jsonData):
 
 # End of sortJson
 
+# Function to get json data in ascending order of fullPrice, sorting only when the catalog did not load it in that order
+def priceOrderedJson(jsonData):
+
+    # Every catalog load comes back flagged as price ordered
+    if getattr(jsonData, 'priceOrdered', False):
+        return jsonData
+
+    return sortJson(jsonData)
+
+# End of priceOrderedJson
+
+# Function to build a cumulative price index over json data already sorted in ascending order of fullPrice
+def buildPriceIndex(jsonData):
+
+	# Prices in integer cents keep the running sums exact and take four bytes per item
+	prices = array('i', [round(item['fullPrice'] * 100) for item in jsonData])
+
+	# Running sum of prices up to and including each item, summed in one pass at C speed
+	cumulative = array('q', accumulate(prices))
+
+	return {'prices': prices, 'cumulative': cumulative}
+
+# End of buildPriceIndex
+
 # Function to select an item index from json database given some maximum price value
-def selectItem(tempMax, jsonData):
+def selectItem(tempMax, jsonData, priceIndex=None):
+
+	# Build the index on the fly when the caller did not provide one
+	if priceIndex is None:
+		priceIndex = buildPriceIndex(jsonData)
 
-	# Sum of prices, start at 0
-	sum = 0
-	tempIndex = 0
+	return selectIndex(int(round(tempMax * 100)), priceIndex)
 
-	# Iterate jsonData for valid items, adding prices for a total sum
-	for item in jsonData:
-		if item['fullPrice'] < tempMax:
-			sum += item['fullPrice']
+# End of selectItem
+
+# Function to select an item index priced under maxCents, each item weighted by its price
+def selectIndex(maxCents, priceIndex):
+
+	prices = priceIndex['prices']
+	cumulative = priceIndex['cumulative']
+
+	# Number of valid items priced under maxCents, their prices summed for a total sum
+	cutoff = bisect.bisect_left(prices, maxCents)
+	if cutoff == 0:
+		return 0
+	sum = cumulative[cutoff - 1]
+	if sum <= 0:
+		return 0
+
+	# Select a random cent from the sum of prices, the item whose running sum passes it owns that cent
+	return bisect.bisect_right(cumulative, random.randrange(sum), 0, cutoff)
+
+# End of selectIndex
+
+# Function to group a price index into one bucket per distinct price and split the buckets into cap bands, for the alias sampler
+def buildAliasSampler(priceIndex):
+
+	prices = priceIndex['prices']
+
+	bucketPrices = array('i')
+	bucketStarts = array('i')
+
+	# Prices are sorted, so the items of a bucket are one contiguous run of indexes
+	for index, cents in enumerate(prices):
+		if not bucketPrices or bucketPrices[-1] != cents:
+			bucketPrices.append(cents)
+			bucketStarts.append(index)
+	bucketStarts.append(len(prices))
+
+	# A bucket weighs its price times its number of items, free items are never drawn
+	bucketWeights = [max(0, bucketPrices[bucket]) * (bucketStarts[bucket + 1] - bucketStarts[bucket]) for bucket in range(len(bucketPrices))]
+	bucketCumulative = array('q', accumulate(bucketWeights))
+
+	# Each band ends where the running weight has grown by aliasBandGrowth, the last band holds every bucket
+	bandEnds = []
+	bandWeight = 0
+	for bucket, runningWeight in enumerate(bucketCumulative):
+		if runningWeight > bandWeight * aliasBandGrowth:
+			if bucket > 0:
+				bandEnds.append(bucket)
+			bandWeight = runningWeight
+	bandEnds.append(len(bucketPrices))
+
+	return {'bucketPrices': bucketPrices, 'bucketStarts': bucketStarts, 'bucketWeights': bucketWeights, 'bucketCumulative': bucketCumulative, 'bandEnds': bandEnds, 'tables': {}}
+
+# End of buildAliasSampler
+
+# Function to build a Walker alias table over integer weights, two lists giving O(1) weighted draws
+def buildAliasTable(weights):
+
+	count = len(weights)
+	total = sum(weights)
+
+	# Scale weights so they average one, a column is full at one
+	scaled = [weight * count / total for weight in weights]
+	probability = [1.0] * count
+	alias = list(range(count))
+
+	small = [index for index, weight in enumerate(scaled) if weight < 1]
+	large = [index for index, weight in enumerate(scaled) if weight >= 1]
+
+	# Top up every short column with part of a tall one
+	while small and large:
+		shortIndex = small.pop()
+		tallIndex = large.pop()
+		probability[shortIndex] = scaled[shortIndex]
+		alias[shortIndex] = tallIndex
+		scaled[tallIndex] = scaled[tallIndex] + scaled[shortIndex] - 1
+		if scaled[tallIndex] < 1:
+			small.append(tallIndex)
 		else:
+			large.append(tallIndex)
+
+	return {'probability': probability, 'alias': alias}
+
+# End of buildAliasTable
+
+# Function to select an item index priced under maxCents with the alias sampler, same distribution as selectIndex
+def aliasSelectIndex(maxCents, sampler):
+
+	bucketStarts = sampler['bucketStarts']
+	bandEnds = sampler['bandEnds']
+	tables = sampler['tables']
+
+	# Buckets priced under the cap are a prefix of the buckets
+	bucketCount = bisect.bisect_left(sampler['bucketPrices'], maxCents)
+	if bucketCount == 0 or sampler['bucketCumulative'][bucketCount - 1] <= 0:
+		return 0
+
+	# The smallest band holding the prefix has one alias table, built the first time a cap falls in it
+	bandEnd = bandEnds[bisect.bisect_left(bandEnds, bucketCount)]
+	table = tables.get(bandEnd)
+	if table is None:
+		table = buildAliasTable(sampler['bucketWeights'][:bandEnd])
+		tables[bandEnd] = table
+
+	probability = table['probability']
+	alias = table['alias']
+
+	# One column draw and one coin flip pick a bucket, buckets of the band over the cap are drawn again
+	while True:
+		bucket = random.randrange(bandEnd)
+		if random.random() >= probability[bucket]:
+			bucket = alias[bucket]
+		if bucket < bucketCount:
 			break
 
-	# Select a random index from the sum of prices for all json items
-	randomNum = random.uniform(0, sum)
+	# Every item in a bucket has the same price
+	return random.randrange(bucketStarts[bucket], bucketStarts[bucket + 1])
 
-	# Find correct item by iterating through json prices until sum is negative 
-	for item in jsonData:
-		if randomNum > item['fullPrice']:
-			randomNum -= item['fullPrice']
-			tempIndex += 1
-		else:
-			return tempIndex
+# End of aliasSelectIndex
 
-	# Return the selected index
-	return tempIndex
+# Compact item record for catalogs held in memory for a long time, reads like the item dict it was built from
+class CatalogItem:
 
-# End of selectItem
+	__slots__ = itemFields + optionalItemFields
+
+	def __init__(self, item):
+		for field in itemFields:
+			setattr(self, field, item[field])
+		for field in optionalItemFields:
+			setattr(self, field, item.get(field))
+
+	# Optional fields that were left out read as missing, same as in the dict
+	def __getitem__(self, field):
+		value = getattr(self, field, None)
+		if value is None and (field in optionalItemFields or field not in itemFields):
+			raise KeyError(field)
+		return value
+
+	def get(self, field, default=None):
+		try:
+			return self[field]
+		except KeyError:
+			return default
+
+	def keys(self):
+		return itemFields + tuple(field for field in optionalItemFields if getattr(self, field) is not None)
+
+	# Pickled as a plain tuple of values, for the worker processes of a batch
+	def __getstate__(self):
+		return tuple(getattr(self, field) for field in self.__slots__)
+
+	def __setstate__(self, state):
+		for field, value in zip(self.__slots__, state):
+			setattr(self, field, value)
+
+# Function to turn json data into compact item records, about a third of the memory of the dicts
+def compactItems(jsonData):
+	return [CatalogItem(item) for item in jsonData]
+
+# Function to turn an item record back into a dict, for json output
+def itemDict(item):
+	return dict(item)
+
+############################################################################################
+# Fenwick tree functions keep running sums of weights that change between draws
+############################################################################################
+
+# Function to build a Fenwick tree over a list of weights in one pass, position 0 of the tree is unused
+def buildFenwickTree(weights):
+
+	tree = array('q', [0]) + array('q', weights)
+
+	# Each node passes its partial sum on to the node covering it
+	for position in range(1, len(tree)):
+		parent = position + (position & -position)
+		if parent < len(tree):
+			tree[parent] += tree[position]
+
+	return tree
+
+# End of buildFenwickTree
+
+# Function to add delta to the weight of the item at index
+def fenwickAdd(tree, index, delta):
+
+	position = index + 1
+	while position < len(tree):
+		tree[position] += delta
+		position += position & -position
+
+# End of fenwickAdd
+
+# Function to sum the weights of the first count items
+def fenwickPrefixSum(tree, count):
+
+	total = 0
+	while count > 0:
+		total += tree[count]
+		count -= count & -count
+
+	return total
+
+# End of fenwickPrefixSum
+
+# Function to find the index of the first item whose running weight is past target, by walking down the tree
+def fenwickFind(tree, target):
+
+	position = 0
+	step = 1 << max(0, (len(tree) - 1).bit_length() - 1)
+
+	while step:
+		nextPosition = position + step
+		if nextPosition < len(tree) and tree[nextPosition] <= target:
+			position = nextPosition
+			target -= tree[nextPosition]
+		step >>= 1
+
+	return position
+
+# End of fenwickFind
+
+# Function to build a sampler that takes drawn items out of stock, each item weighted by its price times its units in stock
+def buildStockSampler(jsonData, priceIndex):
+
+	prices = priceIndex['prices']
+
+	# Items without a stock count are one unit that never runs out, -1 marks them
+	stock = array('i', [-1 if item.get('stock') is None else max(0, int(item['stock'])) for item in jsonData])
+	weights = [max(0, prices[index]) * (1 if stock[index] < 0 else stock[index]) for index in range(len(prices))]
+
+	return {'prices': prices, 'stock': stock, 'tree': buildFenwickTree(weights)}
+
+# End of buildStockSampler
+
+# Function to draw an item index priced under maxCents and take one unit of it out of stock, None when nothing is left under the cap
+def stockSelectIndex(maxCents, sampler):
+
+	prices = sampler['prices']
+	stock = sampler['stock']
+	tree = sampler['tree']
+
+	cutoff = bisect.bisect_left(prices, maxCents)
+	total = fenwickPrefixSum(tree, cutoff)
+	if total <= 0:
+		return None
+
+	index = fenwickFind(tree, random.randrange(total))
+
+	# A drawn unit leaves the shelf, so the item gets less likely with every draw
+	if stock[index] > 0:
+		stock[index] -= 1
+		fenwickAdd(tree, index, -prices[index])
+
+	return index
+
+# End of stockSelectIndex
+
+# Function to put units of an item back in stock, a negative quantity takes units out down to none, O(log n)
+def restockItem(sampler, index, quantity):
+
+	stock = sampler['stock']
+	if stock[index] < 0:
+		return
+
+	quantity = max(quantity, -stock[index])
+	stock[index] += quantity
+	fenwickAdd(sampler['tree'], index, sampler['prices'][index] * quantity)
+
+# End of restockItem
+
+# Function to put one unit of every drawn item back in stock, or take it out again with a quantity of -1
+def restockItems(sampler, indexes, quantity):
+	for index in indexes:
+		restockItem(sampler, index, quantity)
+
+# End of restockItems
 
 ############################################################################################
 # Operation functions that handle some sort of processing
 ############################################################################################
 
 # Function to collect products based on given category and up to given maximum
-def randomizer(category, maxPrice, jsonData):
+@metrics.timed('randomizer', lambda result, category, maxPrice, *args, **kwargs: {'category': category, 'total': maxPrice, 'iterations': len(result['selectedItems']), 'remainder': round(result['remainder'], 2)})
+def randomizer(category, maxPrice, jsonData, priceIndex=None, sampler=None):
 
 	selectedItems = []
+	selectedIndexes = []
 	index = None
-	tempMax = maxPrice
 
-	# Set a minimum monetary threshold to stay within
-	minimum = 0.98
+	# Work in integer cents so the remainder never drifts
+	tempMax = int(round(maxPrice * 100))
 
-	# Sort for selection algorithm
-	jsonData = sortJson(jsonData)
+	# Set a minimum monetary threshold to stay within, in cents
+	minimum = 98
 
-	while tempMax > minimum:
+	# Sort and index for selection algorithm, unless the caller already did so for this catalog
+	if priceIndex is None:
+		jsonData = priceOrderedJson(jsonData)
+		priceIndex = buildPriceIndex(jsonData)
+
+	prices = priceIndex['prices']
 
-		# Get index from jsonData that falls under tempMax limit
-		index = selectItem(tempMax, jsonData)
+	while tempMax > minimum:
 
-		item = jsonData[index]
+		# Get index from jsonData that falls under tempMax limit, from the alias or stock sampler when one was built
+		if sampler is None:
+			index = selectIndex(tempMax, priceIndex)
+		elif 'tree' in sampler:
+			index = stockSelectIndex(tempMax, sampler)
+			if index is None:
+				break
+		else:
+			index = aliasSelectIndex(tempMax, sampler)
 
 		# Add selected item from json data at selected index
-		selectedItems.append(item)
+		selectedItems.append(jsonData[index])
+		selectedIndexes.append(index)
 
-		tempMax = tempMax - item['fullPrice']
+		tempMax = tempMax - prices[index]
 
-	return {'selectedItems': selectedItems, 'remainder': tempMax}
+	return {'selectedItems': selectedItems, 'selectedIndexes': selectedIndexes, 'remainder': tempMax / 100}
 
 # End of randomizer
 
-# Function to build and write html file based on collected parameters
-def htmlBuilder(category, total, selectedItems, remainder):
+# Function to collect products whose prices add up to the maximum price exactly, working in integer cents
+@metrics.timed('exactRandomizer', lambda result, category, maxPrice, *args, **kwargs: {'category': category, 'total': maxPrice, 'items': len(result['selectedItems']), 'remainder': round(result['remainder'], 2)})
+def exactRandomizer(category, maxPrice, jsonData, priceIndex=None, tolerance=0.00, window=1000, maxCandidates=200, attempts=5):
+
+	# Sort and index for selection algorithm, unless the caller already did so for this catalog
+	if priceIndex is None:
+		jsonData = priceOrderedJson(jsonData)
+		priceIndex = buildPriceIndex(jsonData)
+
+	targetCents = int(round(maxPrice * 100))
+	toleranceCents = int(round(tolerance * 100))
+
+	# Group item indexes into price buckets keyed by integer cents, only prices the exact search can use
+	priceBuckets = {}
+	for index, cents in enumerate(priceIndex['prices']):
+		if cents <= 0 or cents > min(window, targetCents):
+			continue
+		priceBuckets.setdefault(cents, []).append(index)
+
+	bestItems = []
+	bestRemainder = targetCents
+
+	# Each attempt is a random fill followed by one bounded search, so the total work is bounded too
+	for attempt in range(attempts):
+
+		selectedItems = []
+		remaining = targetCents
+
+		# Fill randomly with price-weighted picks until the remaining amount fits inside the search window
+		while remaining > window:
+			index = selectIndex(remaining, priceIndex)
+			cents = priceIndex['prices'][index]
+			if cents <= 0 or cents > remaining:
+				break
+			selectedItems.append(jsonData[index])
+			remaining -= cents
+
+		# Shuffle a bounded number of distinct prices so the search result differs from run to run
+		candidates = list(priceBuckets.keys())
+		random.shuffle(candidates)
+		candidates = candidates[:maxCandidates]
+
+		# Unbounded coin change table, reachedBy[s] holds the last price used to reach s cents
+		reachedBy = [0] * (remaining + 1)
+		reachedBy[0] = -1
+		for cents in candidates:
+			for s in range(cents, remaining + 1):
+				if not reachedBy[s] and reachedBy[s - cents]:
+					reachedBy[s] = cents
+
+		# Largest reachable amount that does not go over the remaining amount
+		reached = remaining
+		while reached > 0 and not reachedBy[reached]:
+			reached -= 1
+
+		# Walk the table back to pick a random item for every price in the solution
+		while reached > 0:
+			cents = reachedBy[reached]
+			selectedItems.append(jsonData[random.choice(priceBuckets[cents])])
+			reached -= cents
+			remaining -= cents
+
+		# Keep the attempt with the smallest remainder, stop once inside the tolerance
+		if remaining < bestRemainder or attempt == 0:
+			bestItems = selectedItems
+			bestRemainder = remaining
+		if bestRemainder <= toleranceCents:
+			break
 
-	parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+	return {'selectedItems': bestItems, 'remainder': bestRemainder / 100}
 
-	# Create html header
-	html = f"<html><head><title>{category} Items List</title></head><body><h1 style=font-size:50px>{(category[0].upper()+category[1:])} Items List</h1><h2 style=font-size:35px>Target total: {int(total)}</h2>"
+# End of exactRandomizer
 
-	# Loop through items array and add items to html file
-	for index, item in enumerate(selectedItems):
+# Function to run the randomizer a few times and keep the result with the smallest remainder
+def bestRandomizer(category, maxPrice, jsonData, priceIndex=None, attempts=6, sampler=None):
 
-		item = selectedItems[index]
+	# Sort and index once for every run below
+	if priceIndex is None:
+		jsonData = priceOrderedJson(jsonData)
+		priceIndex = buildPriceIndex(jsonData)
 
-	    # Insert html display flex wrap every n items, background color for every other set of  2
-		if index % 2 == 0:
+	# With a stock sampler every attempt puts its units back, so each one draws from the full shelf
+	stockSampler = sampler is not None and 'tree' in sampler
 
-			if index % 4 == 2 or index % 4 == 3:
-				html += "<div style='display: flex; flex-wrap: wrap; background-color:#ededed;'>"
-			else:
-				html += "<div style='display: flex; flex-wrap: wrap;'>"
+	# Collect randomized items and calculate remainder
+	itemAndRemainder = randomizer(category, maxPrice, jsonData, priceIndex, sampler)
+	if stockSampler:
+		restockItems(sampler, itemAndRemainder['selectedIndexes'], 1)
 
-		# Insert data and png for each item, flex basis determines seperation space
-		if item['taxable'] == 'TAX':
-			html += f"<div style='flex-basis: 45%; padding: 5px;'><h2>{item['name']}</h2><h3>Price: ${item['price']} * => ( ${item['fullPrice']} )</h3>"
-		else:
-			html += f"<div style='flex-basis: 45%; padding: 5px;'><h2>{item['name']}</h2><h3>Price: ${item['fullPrice']}</h3>"
+	# Loop until the remainder is sufficiently small or the attempts run out
+	for i in range(attempts - 1):
 
-		# Replace backslashes with forward slashes in the parentDirectory variable (may be required for windows)
-		tempDirectory = parentDirectory.replace('\\', '/')
-		html += f"<img src='{tempDirectory}/images/{category}/{item['skuNum']}.png'></div>"
+		if itemAndRemainder['remainder'] < 0.09:
+			break
+
+		# Try to get smaller remainder
+		itemAndRemainder2 = randomizer(category, maxPrice, jsonData, priceIndex, sampler)
+		if stockSampler:
+			restockItems(sampler, itemAndRemainder2['selectedIndexes'], 1)
+		if itemAndRemainder2['remainder'] < itemAndRemainder['remainder']:
+			itemAndRemainder = itemAndRemainder2
 
-		if (index + 1) % 2 == 0 or index == (len(selectedItems) - 1):
-			html += "</div>"
+	# Only the units of the kept transaction leave the shelf
+	if stockSampler:
+		restockItems(sampler, itemAndRemainder['selectedIndexes'], -1)
 
-	# Close off the html file
-	html += f"<h2 style='font-size:35px'>Final total: ~${round(total - remainder)}</h2></body></html>"
+	return itemAndRemainder
 
-	# Write html file to parent directory
+# End of bestRandomizer
+
+# Function to build and write html file based on collected parameters
+@metrics.timed('htmlBuilder', lambda result, category, total, selectedItems, *args, **kwargs: {'category': category, 'items': len(selectedItems)})
+def htmlBuilder(category, total, selectedItems, remainder, mode=None):
+
+	parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+	# Write html file to parent directory, shared styles first then the transaction body
 	htmlFilePath = os.path.join(parentDirectory, 'selectedItems.html')
-	htmlFile = open(htmlFilePath, 'w')
-	htmlFile.write(html)
-	htmlFile.close()
+	pages.writeChunks(htmlFilePath, [pages.pageHead(f"{category} Items List"), *pages.transactionChunks(category, total, selectedItems, remainder, mode=mode), "</body></html>"])
 
-	return
+	return htmlFilePath
 
 # End of htmlBuilder
 
@@ -202,43 +582,33 @@ def menuPrompt():
 	# Request total from user, validate for monetary values
 	total = float(question("\033[92m  What is your transaction total? \033[0m", validation=monetaryValueValidation))
 
+	# Request solver mode from user, validate for Y/N answers only
+	exactTotal = question("\033[92m  Would you like the items to add up to the exact total? Y/N \033[0m", booleanCharacterValidation)
+
 	# Reformat user input to fit later use
 	if category == 'y':
 	    category = 'food'
 	else:
 	    category = 'otc'
 
-	# Establish json file path
-	parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-	jsonFilePath = os.path.join(parentDirectory, 'itemArchive', category + '.json')
-
-	# Open json file for writing and load data
-	jsonFile = open(jsonFilePath, 'r+')
-	jsonData = json.load(jsonFile)
-	jsonFile.close()
-
-	# Collect randomized items and calculate remainder
-	itemAndRemainder = randomizer(category, total, jsonData)
-	selectedItems = itemAndRemainder['selectedItems']
-	remainder = itemAndRemainder['remainder']
-
-	# Loop four times to achieve smaller remainder
-	for i in range(5):
+	# Load json data for the chosen category, the catalog keeps it in price order
+	jsonData = loadJsonData(category)
 
-		# Sufficiently small remainder, break
-		if remainder < 0.09:
-			break
+	# Index the catalog once for every randomizer run below
+	priceIndex = buildPriceIndex(jsonData)
 
-		# Try to get smaller remainder
-		else:
+	# Exact total solver makes a single bounded search for a basket that hits the total to the cent
+	if exactTotal.lower() == 'y':
+		itemAndRemainder = exactRandomizer(category, total, jsonData, priceIndex)
+		selectedItems = itemAndRemainder['selectedItems']
+		remainder = itemAndRemainder['remainder']
 
-			# get it
-			itemAndRemainder2 = randomizer(category, total, jsonData)
+	else:
 
-			# check it
-			if itemAndRemainder2['remainder'] < remainder:
-				selectedItems = itemAndRemainder['selectedItems']
-				remainder = itemAndRemainder['remainder']
+		# Collect randomized items, retrying for a smaller remainder
+		itemAndRemainder = bestRandomizer(category, total, jsonData, priceIndex)
+		selectedItems = itemAndRemainder['selectedItems']
+		remainder = itemAndRemainder['remainder']
 
 	try:
 		htmlBuilder(category, total, selectedItems, remainder)
@@ -255,7 +625,18 @@ def menuPrompt():
 # Main menu launcher starts the program
 ##################################################################
 
-menuPrompt()
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Generate a random transaction from the item databases")
+	metrics.addArguments(parser)
+	metrics.configure(parser.parse_args(argv))
+
+	with metrics.run('randomize'):
+		menuPrompt()
+
+if __name__ == '__main__':
+	main()
 
 ###########################################################################
 #
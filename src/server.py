@@ -0,0 +1,263 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Randomizer service
+#
+# Keeps both catalogs parsed, sorted and indexed in memory and serves
+# random transactions over HTTP, so register terminals get a new sheet in
+# a few milliseconds instead of starting a program for every transaction.
+# A catalog is loaded again as soon as its file changes on disk, checked
+# with the same version stamp the catalog layer uses for conflicts.
+#
+# Usage: python server.py --port 8765
+#
+# Then open, from any register...
+#
+#   http://localhost:8765/transaction?category=food&total=300
+#   http://localhost:8765/transaction?category=otc&total=45.50&exact=y&format=json
+#
+# The html sheet is the same page randomize.py writes to selectedItems.html.
+# Add write=y to also write selectedItems.html, and images=inline or svg
+# to embed the barcodes. /status lists the catalogs held in memory and
+# /images/ serves the barcode images linked from the sheets.
+#
+###########################################################################
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import catalog
+import metrics
+import pages
+import randomize
+
+# Address the service listens on, use 0.0.0.0 to reach it from other computers
+serverHost = os.environ.get('OTC_SERVER_HOST', '127.0.0.1')
+serverPort = int(os.environ.get('OTC_SERVER_PORT', '8765'))
+
+# Sorted catalogs and their price indexes, keyed by category
+catalogCache = {}
+
+# Held while a catalog is reloaded so parallel requests wait for one load instead of each doing their own
+cacheLock = threading.Lock()
+
+############################################################################################
+# Cache functions keep the catalogs warm between requests
+############################################################################################
+
+# Function to return the cached catalog of a category, loading it again when its file changed
+def cachedCatalog(category):
+
+    version = catalog.catalogVersion(category)
+
+    entry = catalogCache.get(category)
+    if entry is not None and entry['version'] == version:
+        return entry
+
+    with cacheLock:
+
+        # Another request may have reloaded it while this one waited
+        entry = catalogCache.get(category)
+        if entry is not None and entry['version'] == catalog.catalogVersion(category):
+            return entry
+
+        jsonData, version = catalog.loadJsonDataVersion(category)
+
+        # Long lived catalogs are held as compact item records next to the integer cent price index and its alias sampler
+        priceIndex = randomize.buildPriceIndex(jsonData)
+        entry = {
+            'version': version,
+            'jsonData': randomize.compactItems(jsonData),
+            'priceIndex': priceIndex,
+            'sampler': randomize.buildAliasSampler(priceIndex),
+            'loadedAt': time.time()
+        }
+        catalogCache[category] = entry
+
+        return entry
+
+# End of cachedCatalog
+
+# Function to generate one transaction from the cached catalog
+def generateTransaction(category, total, exactTotal=False):
+
+    entry = cachedCatalog(category)
+
+    if exactTotal:
+        itemAndRemainder = randomize.exactRandomizer(category, total, entry['jsonData'], entry['priceIndex'])
+    else:
+        itemAndRemainder = randomize.bestRandomizer(category, total, entry['jsonData'], entry['priceIndex'], sampler=entry['sampler'])
+
+    return {
+        'category': category,
+        'total': total,
+        'selectedItems': itemAndRemainder['selectedItems'],
+        'remainder': round(itemAndRemainder['remainder'], 2)
+    }
+
+# End of generateTransaction
+
+############################################################################################
+# Request handler answers the register terminals
+############################################################################################
+
+class TransactionRequestHandler(BaseHTTPRequestHandler):
+
+    # Set by main when request logging is switched off
+    quiet = False
+
+    def do_GET(self):
+
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        try:
+            if url.path in ('/', '/transaction'):
+                self.sendTransaction(query)
+            elif url.path == '/status':
+                self.sendStatus()
+            elif url.path.startswith('/images/'):
+                self.sendImage(url.path)
+            else:
+                self.sendText(404, "Not found")
+        except ValueError as e:
+            self.sendText(400, str(e))
+        except FileNotFoundError as e:
+            self.sendText(404, f"Missing database: {e.filename}")
+
+    # Function to validate the query, generate a transaction and send it as html or json
+    def sendTransaction(self, query):
+
+        category = query.get('category', '').lower()
+        if category not in catalog.categoryList:
+            raise ValueError(f"category must be one of {', '.join(catalog.categoryList)}")
+
+        total = query.get('total', '')
+        if not randomize.monetaryValueValidation(total):
+            raise ValueError("total must be a monetary value")
+        total = float(total.replace(',', ''))
+
+        mode = query.get('images') or None
+        if mode not in (None, 'link', 'inline', 'svg'):
+            raise ValueError("images must be link, inline or svg")
+
+        exactTotal = query.get('exact', 'n').lower() in ('y', 'yes', '1', 'true')
+        transaction = generateTransaction(category, total, exactTotal)
+
+        if query.get('write', 'n').lower() in ('y', 'yes', '1', 'true'):
+            randomize.htmlBuilder(category, total, transaction['selectedItems'], transaction['remainder'], mode=mode)
+
+        if query.get('format', 'html') == 'json':
+            self.sendBody(200, 'application/json', json.dumps(transaction, default=randomize.itemDict))
+            return
+
+        # Linked barcode images resolve to /images/ on this server, like the file next to the images folder
+        html = ''.join([pages.pageHead(f"{category} Items List"), *pages.transactionChunks(category, total, transaction['selectedItems'], transaction['remainder'], mode=mode), "</body></html>"])
+        self.sendBody(200, 'text/html; charset=utf-8', html)
+
+    # Function to send a barcode image, so the linked images of a served sheet load like they do from the file
+    def sendImage(self, path):
+
+        parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        imagesDirectory = os.path.join(parentDirectory, 'images')
+        imagePath = os.path.normpath(os.path.join(parentDirectory, path.lstrip('/')))
+
+        # Never serve anything outside the images folder
+        if not imagePath.startswith(imagesDirectory + os.sep) or not imagePath.endswith('.png') or not os.path.isfile(imagePath):
+            self.sendText(404, "Not found")
+            return
+
+        with open(imagePath, 'rb') as imageFile:
+            image = imageFile.read()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(image)))
+        self.end_headers()
+        self.wfile.write(image)
+
+    # Function to send the catalogs held in memory and when they were loaded
+    def sendStatus(self):
+
+        status = {
+            category: {'items': len(entry['jsonData']), 'loadedAt': entry['loadedAt']}
+            for category, entry in catalogCache.items()
+        }
+        self.sendBody(200, 'application/json', json.dumps(status))
+
+    def sendText(self, code, text):
+        self.sendBody(code, 'text/plain; charset=utf-8', text + "\n")
+
+    def sendBody(self, code, contentType, body):
+
+        body = body.encode('utf-8')
+
+        self.send_response(code)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+# End of TransactionRequestHandler
+
+##################################################################
+# Main launcher loads the catalogs and starts serving
+##################################################################
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Serve random transactions from catalogs kept in memory")
+    parser.add_argument('--host', default=serverHost, help="address to listen on")
+    parser.add_argument('--port', type=int, default=serverPort, help="port to listen on")
+    parser.add_argument('--quiet', action='store_true', help="do not log every request")
+    metrics.addArguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure(args)
+
+    TransactionRequestHandler.quiet = args.quiet
+
+    # Warm the cache up front so the first register does not wait for a load
+    for category in catalog.categoryList:
+        try:
+            print(f"  Loaded {len(cachedCatalog(category)['jsonData'])} {category} items")
+        except FileNotFoundError:
+            print(f"  No {category} database yet")
+
+    server = ThreadingHTTPServer((args.host, args.port), TransactionRequestHandler)
+    print(f"  Serving transactions on http://{args.host}:{args.port}/transaction, press Ctrl+C to stop")
+
+    try:
+        with metrics.run('server'):
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
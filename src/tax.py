@@ -0,0 +1,275 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Tax profiles
+#
+# Works out the fullPrice of taxable items from a tax profile instead of a
+# rate written into the code. A profile has a sales tax rate, optional
+# rates per category and a rounding rule for the tax in whole cents, one
+# of 'halfUp', 'halfEven', 'up' or 'down'. All the arithmetic is done in
+# integer cents with rates in whole millionths, so no float error ever
+# reaches a stored price.
+#
+# The built-in 'default' profile is the 8.875% rate the programs always
+# used. More profiles, one per store for example, go in taxProfiles.json
+# in the project folder...
+#
+#   {"default": {"rate": "0.08875"},
+#    "jerseyCity": {"rate": "0.06625", "categories": {"food": "0"}, "rounding": "halfEven"}}
+#
+# ...and the OTC_TAX_PROFILE environment variable picks the profile new
+# and updated items are priced with. After changing the rates, run
+#
+#   python cli.py retax --profile jerseyCity
+#
+# to work out every fullPrice of the catalog again in one pass. The
+# randomizer can also draw against full prices of any other profile
+# without changing the stored ones, see --tax-profile on cli.py and
+# batch.py.
+#
+###########################################################################
+
+import json
+import os
+from array import array
+
+import catalog
+import metrics
+
+# Profile used for new and updated items
+activeTaxProfile = os.environ.get('OTC_TAX_PROFILE', 'default')
+
+# Profiles known without a taxProfiles.json file
+builtInTaxProfiles = {
+    'default': {'rate': '0.08875', 'rounding': 'halfUp'}
+}
+
+# Rounding rules for the tax of an item, applied to a whole number of cents
+roundingRules = ('halfUp', 'halfEven', 'up', 'down')
+
+# Rates are held as whole millionths so every tax amount is integer arithmetic
+rateScale = 1000000
+
+# Profiles once read and checked, None until the first lookup
+loadedTaxProfiles = None
+
+# Raised when a tax profile is unknown or its config is not valid
+class TaxProfileError(ValueError):
+    pass
+
+############################################################################################
+# Profile functions that read and check the tax profiles
+############################################################################################
+
+# Function to establish the path of the tax profile file
+def taxProfilesPath():
+    parentDirectory = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+    return os.path.join(parentDirectory, 'taxProfiles.json')
+
+# Function to turn a rate such as "0.08875" into whole millionths, refusing rates that do not fit exactly
+def parseRate(value, profileName):
+    from decimal import Decimal, InvalidOperation
+
+    try:
+        rate = Decimal(str(value)) * rateScale
+    except InvalidOperation:
+        raise TaxProfileError(f"Tax profile {profileName!r} has an invalid rate {value!r}")
+
+    if rate != rate.to_integral_value() or rate < 0:
+        raise TaxProfileError(f"Tax profile {profileName!r} has a rate {value!r} that is negative or finer than a millionth")
+
+    return int(rate)
+
+# End of parseRate
+
+# Function to check a profile from the config and turn it into integer rates
+def parseProfile(profileName, profile):
+
+    if not isinstance(profile, dict) or 'rate' not in profile:
+        raise TaxProfileError(f"Tax profile {profileName!r} has no rate")
+
+    rounding = profile.get('rounding', 'halfUp')
+    if rounding not in roundingRules:
+        raise TaxProfileError(f"Tax profile {profileName!r} has an unknown rounding rule {rounding!r}")
+
+    if not isinstance(profile.get('categories', {}), dict):
+        raise TaxProfileError(f"Tax profile {profileName!r} must give its category rates as an object")
+
+    return {
+        'name': profileName,
+        'rate': parseRate(profile['rate'], profileName),
+        'categories': {category: parseRate(rate, profileName) for category, rate in profile.get('categories', {}).items()},
+        'rounding': rounding
+    }
+
+# End of parseProfile
+
+# Function to load the built-in profiles with the ones of taxProfiles.json on top
+def loadTaxProfiles():
+    global loadedTaxProfiles
+
+    if loadedTaxProfiles is None:
+        profiles = dict(builtInTaxProfiles)
+
+        # A broken file is reported like a broken profile, so the programs print it instead of a traceback
+        try:
+            with open(taxProfilesPath(), 'r') as profilesFile:
+                fileProfiles = json.load(profilesFile)
+        except FileNotFoundError:
+            fileProfiles = {}
+        except ValueError as e:
+            raise TaxProfileError(f"{taxProfilesPath()} is not valid json: {e}")
+
+        if not isinstance(fileProfiles, dict):
+            raise TaxProfileError(f"{taxProfilesPath()} must hold an object of profiles by name")
+        profiles.update(fileProfiles)
+
+        loadedTaxProfiles = {profileName: parseProfile(profileName, profile) for profileName, profile in profiles.items()}
+
+    return loadedTaxProfiles
+
+# End of loadTaxProfiles
+
+# Function to get a profile by name, or the active profile, passing checked profiles through
+def taxProfile(profile=None):
+
+    if isinstance(profile, dict):
+        return profile
+
+    profileName = profile or activeTaxProfile
+    profiles = loadTaxProfiles()
+
+    if profileName not in profiles:
+        raise TaxProfileError(f"Unknown tax profile {profileName!r}, known profiles are {', '.join(sorted(profiles))}")
+
+    return profiles[profileName]
+
+# End of taxProfile
+
+# Function to get the rate of a category in millionths, the profile rate unless the category has its own
+def categoryRate(profile, category):
+    return profile['categories'].get(category, profile['rate'])
+
+############################################################################################
+# Price functions that work out full prices in integer cents
+############################################################################################
+
+# Function to round tax amounts given in millionths of a cent to whole cents, all at once
+def roundTax(amounts, rounding):
+
+    if rounding == 'halfUp':
+        return [(amount + rateScale // 2) // rateScale for amount in amounts]
+    if rounding == 'up':
+        return [-(-amount // rateScale) for amount in amounts]
+    if rounding == 'down':
+        return [amount // rateScale for amount in amounts]
+
+    # Half way amounts go to the even cent
+    rounded = []
+    for amount in amounts:
+        cents, rest = divmod(amount, rateScale)
+        if rest * 2 > rateScale or (rest * 2 == rateScale and cents % 2):
+            cents += 1
+        rounded.append(cents)
+
+    return rounded
+
+# End of roundTax
+
+# Function to turn a price in dollars into whole cents
+def priceCents(price):
+    return int(round(float(price) * 100))
+
+# Function to calculate the full price of an item, tax included when it is taxable
+def calculateFullPrice(price, taxable, category=None, profile=None):
+
+    cents = priceCents(price)
+
+    if taxable == 'TAX':
+        profile = taxProfile(profile)
+        cents += roundTax([cents * categoryRate(profile, category)], profile['rounding'])[0]
+
+    return cents / 100
+
+# End of calculateFullPrice
+
+# Function to work out the full price in cents of every item in one pass, returns an array of cents
+@metrics.timed('taxRecompute', lambda result, jsonData, category, profile=None: {'category': category, 'items': len(jsonData)})
+def fullPriceCents(jsonData, category, profile=None):
+
+    profile = taxProfile(profile)
+    rate = categoryRate(profile, category)
+
+    cents = array('q', [round(item['price'] * 100) for item in jsonData])
+
+    # A catalog only has a few thousand distinct prices, so the tax is rounded once per price rather than once per item
+    distinctCents = list(set(cents))
+    taxes = dict(zip(distinctCents, roundTax([value * rate for value in distinctCents], profile['rounding'])))
+
+    return array('q', [value + taxes[value] if item['taxable'] == 'TAX' else value for value, item in zip(cents, jsonData)])
+
+# End of fullPriceCents
+
+# Function to give items the full prices of a profile, returns the items and how many full prices changed
+def recomputeFullPrices(jsonData, category, profile=None):
+
+    recomputed = []
+    changed = 0
+
+    # Items keep their dict unless the full price really changed
+    for item, cents in zip(jsonData, fullPriceCents(jsonData, category, profile)):
+        if item['fullPrice'] != cents / 100:
+            item = dict(item, fullPrice=cents / 100)
+            changed += 1
+        recomputed.append(item)
+
+    return recomputed, changed
+
+# End of recomputeFullPrices
+
+# Function to get items priced under another profile without changing the stored ones, in the new price order
+def repriceItems(jsonData, category, profile=None):
+
+    recomputed, changed = recomputeFullPrices(jsonData, category, profile)
+
+    if changed == 0 and getattr(jsonData, 'priceOrdered', False):
+        return jsonData
+
+    return catalog.PriceOrderedItems(catalog.sortByPrice(recomputed))
+
+# End of repriceItems
+
+# Function to store the full prices of a profile for a whole category, returns how many changed and the item count
+def recomputeCategory(category, profile=None, dryRun=False):
+
+    # Start over when another terminal changed the database in the meantime
+    while True:
+        jsonData, version = catalog.loadJsonDataVersion(category)
+        recomputed, changed = recomputeFullPrices(jsonData, category, profile)
+
+        if changed == 0 or dryRun:
+            return changed, len(jsonData)
+
+        try:
+            catalog.saveJsonData(category, recomputed, expectedVersion=version)
+            return changed, len(jsonData)
+        except catalog.CatalogConflictError:
+            continue
+
+# End of recomputeCategory
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
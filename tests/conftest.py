@@ -0,0 +1,51 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Test setup
+#
+# The programs import each other by module name from the src folder, so
+# the tests put that folder on the import path the same way running a
+# program from it does. Run the tests from the project folder with...
+#
+#   python -m pytest tests
+#
+# Tests that read or write the catalog use the scratchCatalog fixture,
+# which points the itemArchive files, the sqlite database, the barcode
+# images and the tax profiles at a temporary folder so the real catalog
+# is never touched.
+#
+###########################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'src')))
+
+import pytest
+
+import catalog
+import manage
+import tax
+
+# Fixture giving each test an empty itemArchive folder of its own on the json backend, returns the folder
+@pytest.fixture
+def scratchCatalog(tmp_path, monkeypatch):
+
+    archive = tmp_path / 'itemArchive'
+    archive.mkdir()
+
+    monkeypatch.setattr(catalog, 'catalogPath', lambda category: str(archive / (category + '.json')))
+    monkeypatch.setattr(catalog, 'sqlitePath', lambda: str(archive / 'catalog.db'))
+    monkeypatch.setattr(catalog, 'catalogBackend', 'json')
+    monkeypatch.setattr(catalog, 'skuIndexCache', {})
+    monkeypatch.setattr(manage, 'imageDirectory', lambda category: str(tmp_path / 'images' / category))
+    monkeypatch.setattr(tax, 'taxProfilesPath', lambda: str(tmp_path / 'taxProfiles.json'))
+    monkeypatch.setattr(tax, 'activeTaxProfile', 'default')
+    monkeypatch.setattr(tax, 'loadedTaxProfiles', None)
+
+    return archive
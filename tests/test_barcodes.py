@@ -0,0 +1,109 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Barcode sync tests
+#
+# syncBarcodes runs against a stand-in barcode api on this machine, which
+# fails some skus with server errors or rate limiting before it answers.
+# Server errors and 429 are retried with a doubling backoff, other client
+# errors are not, and only images that arrived go into the manifest.
+#
+###########################################################################
+
+import http.server
+import json
+import os
+import threading
+
+import pytest
+
+import manage
+
+pytest.importorskip('requests')
+
+# Status codes the stand-in api answers each sku with, one per request, the last one repeating
+statusSequences = {
+    '012345678901': [500, 429, 200],
+    '012345678902': [200],
+    '012345678903': [404],
+    '012345678904': [503]
+}
+
+# Fixture running the stand-in barcode api on a free port, returns its url and the requests it got per sku
+@pytest.fixture
+def barcodeApi():
+
+    requestCounts = {}
+
+    class BarcodeApiHandler(http.server.BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            skuNum = self.path.rsplit('/', 1)[-1]
+            requestCounts[skuNum] = requestCounts.get(skuNum, 0) + 1
+            sequence = statusSequences[skuNum]
+            status = sequence[min(requestCounts[skuNum], len(sequence)) - 1]
+
+            body = b'png ' + skuNum.encode('ascii') if status == 200 else b'error'
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), BarcodeApiHandler)
+    serverThread = threading.Thread(target=server.serve_forever, daemon=True)
+    serverThread.start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/code128/", requestCounts
+
+    server.shutdown()
+    server.server_close()
+
+def testSyncRetriesAndReportsEachItem(scratchCatalog, monkeypatch, barcodeApi):
+
+    apiUrl, requestCounts = barcodeApi
+    jsonData = [{'name': 'Test item', 'price': 1.0, 'skuNum': skuNum, 'taxable': 'NO TAX', 'fullPrice': 1.0} for skuNum in statusSequences]
+
+    # The backoff waits are recorded instead of slept
+    waits = []
+    monkeypatch.setattr(manage.time, 'sleep', waits.append)
+
+    outcome = manage.syncBarcodes(jsonData, 'food', concurrency=2, apiUrl=apiUrl, source='api')
+    results = {result['skuNum']: result for result in outcome['results']}
+
+    assert requestCounts == {'012345678901': 3, '012345678902': 1, '012345678903': 1, '012345678904': 4}
+    assert sorted(waits) == [0.5, 0.5, 1.0, 1.0, 2.0]
+
+    assert results['012345678901']['ok'] and results['012345678901']['attempts'] == 3
+    assert results['012345678902']['ok'] and results['012345678902']['attempts'] == 1
+    assert results['012345678903']['error'] == "Status code: 404" and results['012345678903']['attempts'] == 1
+    assert results['012345678904']['error'] == "Status code: 503" and results['012345678904']['attempts'] == 4
+
+    # Only the images that arrived are on disk and in the manifest
+    categoryDirectory = manage.imageDirectory('food')
+    with open(os.path.join(categoryDirectory, '012345678901.png'), 'rb') as imageFile:
+        assert imageFile.read() == b'png 012345678901'
+    with open(os.path.join(categoryDirectory, 'manifest.json'), 'r') as manifestFile:
+        assert sorted(json.load(manifestFile)) == ['012345678901', '012345678902']
+
+    # A second incremental sync only asks again for the images that are still missing
+    manage.syncBarcodes(jsonData, 'food', concurrency=2, apiUrl=apiUrl, source='api')
+    assert requestCounts == {'012345678901': 3, '012345678902': 1, '012345678903': 2, '012345678904': 8}
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -0,0 +1,93 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Bulk import tests
+#
+# A bulk file is applied record by record. A line that cannot be parsed,
+# a value that is not a record or a record that fails validation is
+# reported with its number and skipped, and every good record around it
+# is still saved.
+#
+###########################################################################
+
+import csv
+import io
+
+import bulk
+import catalog
+
+# Function to apply the text of a bulk file to the scratch catalog
+def importText(text, fileFormat):
+    return bulk.applyRecords(bulk.readRecords(io.StringIO(text), fileFormat), 'upsert')
+
+def testJsonlKeepsGoodRecordsAroundBadLines(scratchCatalog):
+
+    text = '\n'.join([
+        '{"category": "food", "skuNum": "012345678901", "name": "Apple juice", "price": "2.99", "taxable": "N"}',
+        '{bad',
+        '5',
+        '{"category": "food", "skuNum": "012345678902", "name": "Pear juice", "price": "abc", "taxable": "N"}',
+        '{"category": "food", "skuNum": "012345678903", "name": "Grape juice", "price": "3.49", "taxable": "Y"}',
+    ]) + '\n'
+
+    report = importText(text, 'jsonl')
+
+    assert report['added'] == 2
+    assert [error.split(':')[0] for error in report['errors']] == ['Record 2', 'Record 3', 'Record 4']
+    assert 'Line 2' in report['errors'][0]
+    assert [item['skuNum'] for item in catalog.loadJsonData('food')] == ['012345678901', '012345678903']
+
+def testCsvKeepsGoodRecordsAroundBadRows(scratchCatalog):
+
+    # A field over the csv field size limit makes the csv reader itself fail on that row
+    text = 'op,category,skuNum,name,price,taxable\n' \
+        ',food,012345678901,Apple juice,2.99,N\n' \
+        'add,food,0123,Short sku,1.00,N\n' \
+        ',food,012345678902,' + 'x' * (csv.field_size_limit() + 1) + ',2.49,N\n' \
+        ',food,012345678903,Grape juice,3.49,Y\n'
+
+    report = importText(text, 'csv')
+
+    assert report['added'] == 2
+    assert [error.split(':')[0] for error in report['errors']] == ['Record 2', 'Record 3']
+    assert 'Unreadable row' in report['errors'][1]
+    assert [item['skuNum'] for item in catalog.loadJsonData('food')] == ['012345678901', '012345678903']
+
+def testDeletingOneCopyOfADuplicateSkuKeepsTheOther(scratchCatalog):
+
+    # Catalogs saved before adds were checked can hold a sku twice
+    catalog.saveJsonData('food', [
+        {'name': 'Apple juice', 'price': 2.99, 'skuNum': '012345678901', 'taxable': 'NO TAX', 'fullPrice': 2.99},
+        {'name': 'Apple cider', 'price': 3.99, 'skuNum': '012345678901', 'taxable': 'NO TAX', 'fullPrice': 3.99},
+    ])
+
+    text = '{"op": "delete", "skuNum": "012345678901"}\n' \
+        '{"op": "update", "skuNum": "0123456789", "name": "Apple nectar"}\n'
+
+    report = importText(text, 'jsonl')
+
+    assert report['deleted'] == 1 and report['updated'] == 1 and not report['errors']
+    assert [item['name'] for item in catalog.loadJsonData('food')] == ['Apple nectar']
+
+def testBadJsonListIsReported(scratchCatalog):
+
+    report = importText('[{"skuNum": ', 'json')
+
+    assert report['added'] == 0
+    assert report['errors'][0].startswith('Record 1: Not a json list')
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -0,0 +1,93 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Catalog tests
+#
+# Every single item change must leave the catalog the same on the json
+# and sqlite backends, and an add never overwrites an item already stored
+# under the same full sku number.
+#
+###########################################################################
+
+import pytest
+
+import bulk
+import catalog
+import manage
+import randomize
+
+# Function to build an item the way the add menu does
+def newItem(skuNum, price, name='Test item'):
+    return manage.buildItem(name, skuNum, price, 'NO TAX', category='food')
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def testAddRefusesStoredSku(scratchCatalog, monkeypatch, backend):
+
+    monkeypatch.setattr(catalog, 'catalogBackend', backend)
+
+    assert catalog.addItem('food', newItem('012345678901', 2.99, 'Apple juice'))
+    with pytest.raises(catalog.DuplicateItemError):
+        catalog.addItem('food', newItem('012345678901', 1.00, 'Mistyped juice'))
+
+    # A sku that only starts with a stored one is a different item
+    assert catalog.addItem('food', newItem('0123456789012', 1.00))
+
+    assert [item['name'] for item in catalog.loadJsonData('food')] == ['Test item', 'Apple juice']
+
+def testBulkAddRefusesStoredSku(scratchCatalog):
+
+    catalog.addItem('food', newItem('012345678901', 2.99, 'Apple juice'))
+
+    report = bulk.applyRecords([
+        {'category': 'food', 'skuNum': '012345678901', 'name': 'Mistyped juice', 'price': '1.00', 'taxable': 'N'},
+        {'category': 'food', 'skuNum': '012345678902', 'name': 'Pear juice', 'price': '1.50', 'taxable': 'N'},
+        {'category': 'food', 'skuNum': '012345678902', 'name': 'Pear juice again', 'price': '1.50', 'taxable': 'N'},
+    ], 'add')
+
+    assert report['added'] == 1
+    assert len(report['errors']) == 2
+    assert sorted(item['name'] for item in catalog.loadJsonData('food')) == ['Apple juice', 'Pear juice']
+
+def testChangedItemsAreNoLongerFlaggedInOrder(scratchCatalog):
+
+    for skuNum, price in (('012345678901', 2.99), ('012345678902', 4.99)):
+        catalog.addItem('food', newItem(skuNum, price))
+
+    jsonData = catalog.loadJsonData('food')
+    assert jsonData.priceOrdered and randomize.priceOrderedJson(jsonData) is jsonData
+
+    # Removing keeps the order, adding a cheaper item at the end does not
+    jsonData.pop()
+    assert jsonData.priceOrdered
+    jsonData.append(newItem('012345678903', 0.99))
+    assert not jsonData.priceOrdered
+    assert [item['fullPrice'] for item in randomize.priceOrderedJson(jsonData)] == [0.99, 2.99]
+
+    # Each loaded list carries its own flag
+    assert catalog.loadJsonData('food').priceOrdered
+
+def testReplayedAddKeepsStoredItem():
+
+    storedItem = newItem('012345678901', 3.49, 'Apple juice')
+    records = [
+        {'op': 'add', 'item': newItem('012345678901', 2.99, 'Apple juice')},
+        {'op': 'add', 'item': storedItem},
+    ]
+
+    assert catalog.replayJournal([storedItem], records) == [storedItem]
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -0,0 +1,137 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Journal tests
+#
+# Single item changes on the json backend are journal lines replayed over
+# the json file. A load must give the same items whether the journal was
+# compacted, interrupted half way through a compaction or left with a
+# torn last line by a crash, and the sqlite backend must end up with the
+# same items after the same changes.
+#
+###########################################################################
+
+import json
+import os
+
+import pytest
+
+import catalog
+import manage
+
+# Function to build an item the way the add menu does
+def newItem(skuNum, price, name='Test item'):
+    return manage.buildItem(name, skuNum, price, 'NO TAX', category='food')
+
+# Function to make a few single item changes, returns the items the catalog must then hold in order
+def makeChanges():
+
+    catalog.addItem('food', newItem('012345678901', 2.99, 'Apple juice'))
+    catalog.addItem('food', newItem('012345678902', 1.49, 'Pear juice'))
+    catalog.addItem('food', newItem('012345678903', 4.99, 'Grape juice'))
+
+    updatedItem = newItem('012345678902', 5.49, 'Pear juice')
+    catalog.updateItem('food', '012345678902', updatedItem)
+    catalog.deleteItem('food', '012345678901')
+
+    return [newItem('012345678903', 4.99, 'Grape juice'), updatedItem]
+
+# Function to read the records of a journal or audit file
+def readLines(filePath):
+    with open(filePath, 'r') as lineFile:
+        return [json.loads(line) for line in lineFile if line.strip()]
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def testChangesReplayInPriceOrder(scratchCatalog, monkeypatch, backend):
+
+    monkeypatch.setattr(catalog, 'catalogBackend', backend)
+
+    expectedItems = makeChanges()
+
+    assert catalog.loadJsonData('food') == expectedItems
+    assert catalog.findItem('food', '0123456789') == expectedItems[0]
+
+def testJournalIsOnlyWrittenToUntilCompaction(scratchCatalog, monkeypatch):
+
+    expectedItems = makeChanges()
+
+    assert not os.path.exists(catalog.catalogPath('food'))
+    assert [record['op'] for record in readLines(catalog.journalPath('food'))] == ['add', 'add', 'add', 'update', 'delete']
+
+    # The next change pushes the journal over the limit and folds every record into the json file
+    monkeypatch.setattr(catalog, 'journalCompactionBytes', 1)
+    catalog.addItem('food', newItem('012345678904', 0.99, 'Lemon juice'))
+    expectedItems.insert(0, newItem('012345678904', 0.99, 'Lemon juice'))
+
+    assert not os.path.exists(catalog.journalPath('food'))
+    assert len(readLines(catalog.auditPath('food'))) == 6
+    with open(catalog.catalogPath('food'), 'r') as jsonFile:
+        assert json.load(jsonFile) == expectedItems
+    assert catalog.loadJsonData('food') == expectedItems
+
+def testCrashBeforeJsonFileIsReplacedLosesNothing(scratchCatalog, monkeypatch):
+
+    expectedItems = makeChanges()
+
+    def crash(*args):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch, pytest.raises(KeyboardInterrupt):
+        patch.setattr(os, 'replace', crash)
+        catalog.compactJournal('food')
+
+    # The json file was never replaced, its temporary file is gone and the journal still holds every change
+    assert sorted(os.listdir(scratchCatalog)) == ['food.cache', 'food.journal.jsonl', 'food.lock']
+    assert catalog.loadJsonData('food') == expectedItems
+
+def testCrashBeforeJournalIsArchivedReplaysIdempotently(scratchCatalog, monkeypatch):
+
+    expectedItems = makeChanges()
+
+    def crash(category):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch, pytest.raises(KeyboardInterrupt):
+        patch.setattr(catalog, 'archiveJournal', crash)
+        catalog.compactJournal('food')
+
+    # The json file already holds every change and the same records are replayed over it again
+    with open(catalog.catalogPath('food'), 'r') as jsonFile:
+        assert json.load(jsonFile) == expectedItems
+    assert len(readLines(catalog.journalPath('food'))) == 5
+    assert catalog.loadJsonData('food') == expectedItems
+
+    catalog.compactJournal('food')
+    assert catalog.loadJsonData('food') == expectedItems
+
+def testTornLastLineIsIgnoredAndNotJoined(scratchCatalog):
+
+    expectedItems = makeChanges()
+
+    # A crash in the middle of an append leaves half a record and no newline
+    with open(catalog.journalPath('food'), 'ab') as journalFile:
+        journalFile.write(b'{"op": "add", "item": {"name": "Half')
+
+    assert catalog.loadJsonData('food') == expectedItems
+
+    # The next record starts on a line of its own, so it is read and the torn one still skipped
+    catalog.addItem('food', newItem('012345678904', 0.99, 'Lemon juice'))
+
+    assert catalog.loadJsonData('food') == [newItem('012345678904', 0.99, 'Lemon juice')] + expectedItems
+    assert len(catalog.readJournal('food')) == 6
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
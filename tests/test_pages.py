@@ -0,0 +1,65 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Html page tests
+#
+# Linked barcode images must resolve from wherever a page is written, the
+# project folder, any other folder or no file at all.
+#
+###########################################################################
+
+import os
+import re
+
+import batch
+import pages
+
+# Item with a sku whose barcode image path is easy to find in a page
+testItem = {'name': 'Apple juice', 'price': 2.99, 'skuNum': '012345678901', 'taxable': 'NO TAX', 'fullPrice': 2.99}
+
+# Function to get the folder of the food barcode images
+def foodImagesDirectory():
+    return os.path.abspath(os.path.join(os.path.dirname(pages.__file__), os.pardir, 'images', 'food'))
+
+# Function to resolve every linked image of a written page against the folder of the page
+def linkedImages(pagePath):
+    with open(pagePath, 'r') as pageFile:
+        sources = re.findall(r"src='([^']+)'", pageFile.read())
+    return [os.path.normpath(os.path.join(os.path.dirname(pagePath), source)) for source in sources]
+
+def testProjectPagesKeepShortLinks():
+
+    parentDirectory = os.path.dirname(os.path.dirname(foodImagesDirectory()))
+    assert pages.imageDirectoryFor('food', os.path.join(parentDirectory, 'masterList.html')) == 'images/food'
+
+def testPagesElsewhereLinkBackToTheImages(tmp_path):
+
+    writtenPaths = pages.writeMasterList('food', [testItem], directory=str(tmp_path), mode='link')
+    assert linkedImages(writtenPaths[0]) == [os.path.join(foodImagesDirectory(), '012345678901.png')]
+
+    transactions = [{'category': 'food', 'total': 5, 'selectedItems': [testItem], 'remainder': 2.01}]
+    pagePath = str(tmp_path / 'nested' / 'out.html')
+    os.makedirs(os.path.dirname(pagePath))
+    with open(pagePath, 'w') as outputFile:
+        batch.writeHtml(transactions, outputFile, 'link', pagePath)
+
+    assert linkedImages(pagePath) == [os.path.join(foodImagesDirectory(), '012345678901.png')]
+
+def testPagesWithoutAFileLinkAbsolutely():
+    assert pages.imageDirectoryFor('food').startswith('file://')
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
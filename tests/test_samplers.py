@@ -0,0 +1,121 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Sampler tests
+#
+# Both samplers must draw every item priced under the cap in proportion
+# to its price. The bisect sampler is checked by walking every cent it can
+# draw, the alias tables by working out their exact draw probabilities,
+# and both with a seeded chi-square test over many real draws.
+#
+###########################################################################
+
+import random
+
+import pytest
+
+import benchmark
+import randomize
+
+# Prices in cents with repeats, so the alias sampler has buckets holding several items
+testPrices = [25, 40, 40, 99, 120, 120, 120, 250, 310, 475, 475, 600, 899, 1200, 1499, 2000, 2000, 3150]
+
+# Caps below, between and above the prices, a cap equal to a price leaves that price out
+testCaps = [26, 100, 121, 476, 1200, 2001, 5000]
+
+# Function to build a price index and alias sampler over the test prices
+def buildSamplers():
+
+    jsonData = [{'name': f"Item {index}", 'price': cents / 100, 'skuNum': str(100000000000 + index), 'taxable': 'NO TAX', 'fullPrice': cents / 100} for index, cents in enumerate(testPrices)]
+    priceIndex = randomize.buildPriceIndex(jsonData)
+
+    return priceIndex, randomize.buildAliasSampler(priceIndex)
+
+# Function to get the exact chance of every item under a cap, its price over the prices of all items under the cap
+def expectedWeights(capCents):
+
+    underCap = [cents if cents < capCents else 0 for cents in testPrices]
+    total = sum(underCap)
+
+    return [cents / total for cents in underCap]
+
+@pytest.mark.parametrize('capCents', testCaps)
+def testSelectIndexOwnsOneCentPerPriceCent(capCents, monkeypatch):
+
+    priceIndex, sampler = buildSamplers()
+    total = sum(cents for cents in testPrices if cents < capCents)
+
+    # Every cent the draw can land on is tried once, so the counts are the exact weights
+    counts = [0] * len(testPrices)
+    for cent in range(total):
+        monkeypatch.setattr(randomize.random, 'randrange', lambda stop, cent=cent: cent)
+        counts[randomize.selectIndex(capCents, priceIndex)] += 1
+
+    assert counts == [cents if cents < capCents else 0 for cents in testPrices]
+
+@pytest.mark.parametrize('capCents', testCaps)
+def testAliasTablesGiveExactPriceWeights(capCents):
+
+    priceIndex, sampler = buildSamplers()
+    bucketStarts = sampler['bucketStarts']
+
+    # Make sure the table of the cap's band is built, then read its chances off the columns
+    randomize.aliasSelectIndex(capCents, sampler)
+    bucketCount = randomize.bisect.bisect_left(sampler['bucketPrices'], capCents)
+    bandEnd = sampler['bandEnds'][randomize.bisect.bisect_left(sampler['bandEnds'], bucketCount)]
+    table = sampler['tables'][bandEnd]
+
+    bucketChances = [0.0] * bandEnd
+    for column in range(bandEnd):
+        bucketChances[column] += table['probability'][column] / bandEnd
+        bucketChances[table['alias'][column]] += (1 - table['probability'][column]) / bandEnd
+
+    # Buckets over the cap are drawn again, which spreads their chance over the others, and a bucket splits evenly over its items
+    keptChance = sum(bucketChances[:bucketCount])
+    itemChances = [0.0] * len(testPrices)
+    for bucket in range(bucketCount):
+        for index in range(bucketStarts[bucket], bucketStarts[bucket + 1]):
+            itemChances[index] = bucketChances[bucket] / keptChance / (bucketStarts[bucket + 1] - bucketStarts[bucket])
+
+    assert itemChances == pytest.approx(expectedWeights(capCents), abs=1e-12)
+
+@pytest.mark.parametrize('samplerName', ['selectIndex', 'aliasSelectIndex'])
+@pytest.mark.parametrize('capCents', testCaps)
+def testDrawsFollowPriceWeights(samplerName, capCents):
+
+    priceIndex, sampler = buildSamplers()
+    if samplerName == 'selectIndex':
+        select = lambda: randomize.selectIndex(capCents, priceIndex)
+    else:
+        select = lambda: randomize.aliasSelectIndex(capCents, sampler)
+
+    draws = 40000
+    random.seed(f"samplers-{samplerName}-{capCents}")
+
+    counts = [0] * len(testPrices)
+    for draw in range(draws):
+        counts[select()] += 1
+
+    weights = expectedWeights(capCents)
+    assert all(count == 0 for count, weight in zip(counts, weights) if weight == 0)
+
+    # One chi-square bin per item under the cap, a single item leaves nothing to test beyond the line above
+    bins = [(count, weight * draws) for count, weight in zip(counts, weights) if weight > 0]
+    statistic = sum((count - expected) ** 2 / expected for count, expected in bins)
+    assert benchmark.chiSquarePValue(statistic, len(bins) - 1) > 0.001
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -0,0 +1,111 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Stock sampler tests
+#
+# Drawing takes a unit out of stock and restocking puts it back, both by
+# updating the Fenwick tree weights. The best of several attempts must
+# give back the units of the attempts it throws away, so a stock batch
+# never hands out more units than are on the shelf.
+#
+###########################################################################
+
+import random
+
+import batch
+import randomize
+
+# Function to build a catalog of stock tracked items, one item with no stock count
+def stockCatalog():
+
+    jsonData = []
+    for index, cents in enumerate([150, 275, 275, 420, 640, 899, 1250, 1999]):
+        item = {'name': f"Item {index}", 'price': cents / 100, 'skuNum': str(100000000000 + index), 'taxable': 'NO TAX', 'fullPrice': cents / 100, 'stock': 3}
+        jsonData.append(item)
+    del jsonData[0]['stock']
+
+    return jsonData
+
+# Function to get the weight of every item straight from the Fenwick tree
+def treeWeights(sampler):
+    return [randomize.fenwickPrefixSum(sampler['tree'], index + 1) - randomize.fenwickPrefixSum(sampler['tree'], index) for index in range(len(sampler['stock']))]
+
+def testRestockUndoesDraws():
+
+    jsonData = stockCatalog()
+    priceIndex = randomize.buildPriceIndex(jsonData)
+    sampler = randomize.buildStockSampler(jsonData, priceIndex)
+    startWeights = treeWeights(sampler)
+    startStock = list(sampler['stock'])
+
+    random.seed(7)
+    drawn = [randomize.stockSelectIndex(5000, sampler) for draw in range(10)]
+    assert list(sampler['stock']) != startStock
+
+    randomize.restockItems(sampler, drawn, 1)
+
+    assert list(sampler['stock']) == startStock
+    assert treeWeights(sampler) == startWeights
+
+def testRestockStopsAtEmpty():
+
+    jsonData = stockCatalog()
+    sampler = randomize.buildStockSampler(jsonData, randomize.buildPriceIndex(jsonData))
+
+    randomize.restockItem(sampler, 3, -10)
+
+    assert sampler['stock'][3] == 0
+    assert treeWeights(sampler)[3] == 0
+
+def testBestRandomizerOnlyTakesTheKeptUnits():
+
+    jsonData = stockCatalog()
+    priceIndex = randomize.buildPriceIndex(jsonData)
+    sampler = randomize.buildStockSampler(jsonData, priceIndex)
+    startStock = list(sampler['stock'])
+
+    # This seed and total make all six attempts, so five of them have to give their units back
+    random.seed(11)
+    itemAndRemainder = randomize.bestRandomizer('food', 25.01, jsonData, priceIndex, attempts=6, sampler=sampler)
+
+    # Untracked items never run out, every other item lost exactly the units of the kept transaction
+    expectedStock = list(startStock)
+    for index in itemAndRemainder['selectedIndexes']:
+        if expectedStock[index] >= 0:
+            expectedStock[index] -= 1
+
+    assert list(sampler['stock']) == expectedStock
+    assert treeWeights(sampler) == [price * (1 if stock < 0 else stock) for price, stock in zip(priceIndex['prices'], expectedStock)]
+
+def testStockBatchNeverExceedsStock():
+
+    jsonData = stockCatalog()
+    priceIndex = randomize.buildPriceIndex(jsonData)
+    catalogs = {'food': (jsonData, priceIndex, randomize.buildAliasSampler(priceIndex))}
+
+    transactions = batch.generateStockBatch([('food', 30)] * 10, catalogs, seed=3)
+
+    drawnUnits = {}
+    for transaction in transactions:
+        for item in transaction['selectedItems']:
+            drawnUnits[item['skuNum']] = drawnUnits.get(item['skuNum'], 0) + 1
+
+    for item in jsonData:
+        if 'stock' in item:
+            assert drawnUnits.get(item['skuNum'], 0) <= item['stock']
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
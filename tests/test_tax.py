@@ -0,0 +1,50 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Tax profile tests
+#
+# Profiles in taxProfiles.json are added to the built-in one, and a file
+# the programs cannot use is reported as a TaxProfileError naming it,
+# which the command lines print as a message instead of a traceback.
+#
+###########################################################################
+
+import pytest
+
+import tax
+
+# Function to write the tax profile file of the scratch catalog
+def writeProfiles(scratchCatalog, text):
+    (scratchCatalog.parent / 'taxProfiles.json').write_text(text)
+
+def testFileProfilesAreAdded(scratchCatalog):
+
+    writeProfiles(scratchCatalog, '{"jerseyCity": {"rate": "0.06625", "categories": {"food": "0"}, "rounding": "halfEven"}}')
+
+    assert tax.calculateFullPrice(10.00, 'TAX', 'otc', 'jerseyCity') == 10.66
+    assert tax.calculateFullPrice(10.00, 'TAX', 'food', 'jerseyCity') == 10.00
+    assert tax.calculateFullPrice(10.00, 'TAX', 'otc') == 10.89
+
+@pytest.mark.parametrize('text', ['{"jerseyCity": {"rate": ', '["jerseyCity"]', '5', '{"jerseyCity": {"rate": "0.06625", "categories": ["food"]}}'])
+def testUnusableFileIsAProfileError(scratchCatalog, text):
+
+    writeProfiles(scratchCatalog, text)
+
+    with pytest.raises(tax.TaxProfileError, match='taxProfiles.json|jerseyCity'):
+        tax.taxProfile('default')
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################
@@ -0,0 +1,143 @@
+###########################################################################
+#
+# OTC Product Database Manager and Random Transaction Generator
+# Author: Gregory Guevara
+# Date: October 2023
+#
+###########################################################################
+#
+# Write safety tests
+#
+# Files are replaced atomically with their mode kept, writers take turns
+# on the category lock, and a save or single item change made from data
+# another writer has changed since fails with CatalogConflictError, on
+# the json and the sqlite backend alike.
+#
+###########################################################################
+
+import os
+import stat
+import threading
+
+import pytest
+
+import catalog
+import manage
+
+# Function to build an item the way the add menu does
+def newItem(skuNum, price, name='Test item'):
+    return manage.buildItem(name, skuNum, price, 'NO TAX', category='food')
+
+def testAtomicWriteReplacesContentAndKeepsMode(scratchCatalog):
+
+    filePath = str(scratchCatalog / 'food.json')
+
+    catalog.atomicWrite(filePath, '[]')
+    os.chmod(filePath, 0o640)
+    catalog.atomicWrite(filePath, '[1]')
+
+    with open(filePath, 'r') as writtenFile:
+        assert writtenFile.read() == '[1]'
+    if os.name != 'nt':
+        assert stat.S_IMODE(os.stat(filePath).st_mode) == 0o640
+    assert os.listdir(scratchCatalog) == ['food.json']
+
+@pytest.mark.skipif(os.name == 'nt', reason="windows has no umask bits to check")
+def testAtomicWriteGivesNewFilesTheUmaskMode(scratchCatalog):
+
+    fileMask = os.umask(0o027)
+    try:
+        catalog.atomicWrite(str(scratchCatalog / 'food.json'), '[]')
+    finally:
+        os.umask(fileMask)
+
+    assert stat.S_IMODE(os.stat(scratchCatalog / 'food.json').st_mode) == 0o640
+
+def testFailedWriteLeavesOldFile(scratchCatalog, monkeypatch):
+
+    filePath = str(scratchCatalog / 'food.json')
+    catalog.atomicWrite(filePath, '[]')
+
+    def fullDisk(*args):
+        raise OSError("No space left on device")
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        patch.setattr(os, 'fsync', fullDisk)
+        catalog.atomicWrite(filePath, '[1]')
+
+    with open(filePath, 'r') as writtenFile:
+        assert writtenFile.read() == '[]'
+    assert os.listdir(scratchCatalog) == ['food.json']
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def testSaveOverChangedCatalogConflicts(scratchCatalog, monkeypatch, backend):
+
+    monkeypatch.setattr(catalog, 'catalogBackend', backend)
+    catalog.saveJsonData('food', [newItem('012345678901', 2.99, 'Apple juice')])
+
+    # Two terminals load the same version, the second save is refused and keeps the first one's change
+    firstItems, firstVersion = catalog.loadJsonDataVersion('food')
+    secondItems, secondVersion = catalog.loadJsonDataVersion('food')
+
+    catalog.saveJsonData('food', firstItems + [newItem('012345678902', 1.49, 'Pear juice')], expectedVersion=firstVersion)
+    with pytest.raises(catalog.CatalogConflictError):
+        catalog.saveJsonData('food', secondItems + [newItem('012345678903', 4.99, 'Grape juice')], expectedVersion=secondVersion)
+
+    assert [item['name'] for item in catalog.loadJsonData('food')] == ['Pear juice', 'Apple juice']
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def testSingleItemChangesOverStaleItemConflict(scratchCatalog, monkeypatch, backend):
+
+    monkeypatch.setattr(catalog, 'catalogBackend', backend)
+    catalog.addItem('food', newItem('012345678901', 2.99, 'Apple juice'))
+    catalog.addItem('food', newItem('012345678902', 1.49, 'Pear juice'))
+
+    # Both terminals look the items up before either one changes them
+    appleItem = catalog.findItem('food', '012345678901')
+    pearItem = catalog.findItem('food', '012345678902')
+
+    assert catalog.updateItem('food', '012345678901', dict(appleItem, name='Apple cider'), expectedItem=appleItem)
+    with pytest.raises(catalog.CatalogConflictError):
+        catalog.updateItem('food', '012345678901', dict(appleItem, name='Apple nectar'), expectedItem=appleItem)
+    with pytest.raises(catalog.CatalogConflictError):
+        catalog.deleteItem('food', '012345678901', expectedItem=appleItem)
+
+    # An item another terminal deleted is reported as gone
+    assert catalog.deleteItem('food', '012345678902', expectedItem=pearItem)
+    assert not catalog.updateItem('food', '012345678902', dict(pearItem, name='Pear nectar'), expectedItem=pearItem)
+
+    assert [item['name'] for item in catalog.loadJsonData('food')] == ['Apple cider']
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def testConcurrentAddsOfOneSkuAddItOnce(scratchCatalog, monkeypatch, backend):
+
+    monkeypatch.setattr(catalog, 'catalogBackend', backend)
+    refused = []
+
+    # Every writer adds the same skus, the lock lets exactly one of them add each
+    def addItems(writer):
+        for index in range(10):
+            try:
+                catalog.addItem('food', newItem(str(100000000000 + index), 1 + index, f"Writer {writer}"))
+            except catalog.DuplicateItemError:
+                refused.append(index)
+
+    writers = [threading.Thread(target=addItems, args=(writer,)) for writer in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert len(refused) == 30
+    assert sorted(item['skuNum'] for item in catalog.loadJsonData('food')) == [str(100000000000 + index) for index in range(10)]
+
+####################################################################################
+#
+# MIT License
+#
+# Copyright (c) 2023 Gregory Guevara gladtobegreg
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+####################################################################################